@@ -7,7 +7,7 @@ from starlette.requests import Request
 
 from .config import get_settings
 from .database import engine
-from .models import RiotStats, RiotToken, SteamStats, User
+from .models import RiotStats, RiotToken, SteamStats, SyncJob, User
 
 
 class AdminAuth(AuthenticationBackend):
@@ -66,6 +66,14 @@ class RiotStatsAdmin(ModelView, model=RiotStats):
   name_plural = "Riot Stats"
 
 
+class SyncJobAdmin(ModelView, model=SyncJob):
+  column_list = [SyncJob.id, SyncJob.user_id, SyncJob.provider, SyncJob.status, SyncJob.attempts, SyncJob.created_at, SyncJob.finished_at]
+  column_sortable_list = [SyncJob.id, SyncJob.created_at]
+  column_default_sort = ("created_at", True)
+  name = "Sync Job"
+  name_plural = "Sync Jobs"
+
+
 def init_admin(app: FastAPI) -> Admin:
   settings = get_settings()
   auth_backend = AdminAuth(settings.admin_username, settings.admin_password, settings.admin_session_secret)
@@ -74,4 +82,5 @@ def init_admin(app: FastAPI) -> Admin:
   admin.add_view(RiotTokenAdmin)
   admin.add_view(SteamStatsAdmin)
   admin.add_view(RiotStatsAdmin)
+  admin.add_view(SyncJobAdmin)
   return admin
@@ -0,0 +1,182 @@
+"""Schema version 1, frozen as it was when versioned migrations were introduced.
+
+Never edit these tables to follow the models: later schema changes belong in new migrations.
+"""
+
+from sqlalchemy import (
+  JSON,
+  Boolean,
+  Column,
+  DateTime,
+  Float,
+  ForeignKey,
+  Index,
+  Integer,
+  LargeBinary,
+  MetaData,
+  String,
+  Table,
+)
+
+metadata = MetaData()
+
+Table(
+  "user",
+  metadata,
+  Column("id", Integer, primary_key=True),
+  Column("email", String),
+  Column("password_hash", String),
+  Column("password_salt", String),
+  Column("email_verified", Boolean, nullable=False),
+  Column("email_verification_token", String),
+  Column("email_verification_sent_at", DateTime),
+  Column("steam_id", String),
+  Column("riot_puuid", String),
+  Column("created_at", DateTime, nullable=False),
+  Index("ix_user_email", "email", unique=True),
+  Index("ix_user_steam_id", "steam_id", unique=True),
+  Index("ix_user_riot_puuid", "riot_puuid", unique=True),
+)
+
+Table(
+  "authstate",
+  metadata,
+  Column("id", Integer, primary_key=True),
+  Column("provider", String, nullable=False),
+  Column("value", String, nullable=False),
+  Column("created_at", DateTime, nullable=False),
+  Column("user_id", Integer, ForeignKey("user.id")),
+  Column("data", JSON),
+  Index("ix_authstate_provider", "provider"),
+  Index("ix_authstate_value", "value", unique=True),
+)
+
+Table(
+  "riottoken",
+  metadata,
+  Column("id", Integer, primary_key=True),
+  Column("user_id", Integer, ForeignKey("user.id"), nullable=False, unique=True),
+  Column("access_token", String, nullable=False),
+  Column("refresh_token", String, nullable=False),
+  Column("expires_at", DateTime, nullable=False),
+  Column("scope", String),
+  Column("updated_at", DateTime, nullable=False),
+)
+
+Table(
+  "authsession",
+  metadata,
+  Column("id", Integer, primary_key=True),
+  Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+  Column("token", String, nullable=False),
+  Column("expires_at", DateTime, nullable=False),
+  Column("created_at", DateTime, nullable=False),
+  Index("ix_authsession_user_id", "user_id"),
+  Index("ix_authsession_token", "token", unique=True),
+)
+
+Table(
+  "steamstats",
+  metadata,
+  Column("id", Integer, primary_key=True),
+  Column("user_id", Integer, ForeignKey("user.id"), nullable=False, unique=True),
+  Column("total_hours", Float, nullable=False),
+  Column("games_count", Integer, nullable=False),
+  Column("recent_hours", Float, nullable=False),
+  Column("longest_session", Integer, nullable=False),
+  Column("top_game", String),
+  Column("last_played_game", String),
+  Column("persona_name", String),
+  Column("avatar_url", String),
+  Column("profile_level", Integer),
+  Column("profile_created_at", Integer),
+  Column("achievements", JSON),
+  Column("rare_achievements", JSON),
+  Column("completed_games", JSON),
+  Column("game_snapshots", JSON),
+  Column("incomplete_stages", JSON),
+  Column("last_synced_at", DateTime, nullable=False),
+  Column("raw_games", JSON),
+  Index("ix_steamstats_last_synced_at", "last_synced_at"),
+)
+
+Table(
+  "riotstats",
+  metadata,
+  Column("id", Integer, primary_key=True),
+  Column("user_id", Integer, ForeignKey("user.id"), nullable=False, unique=True),
+  Column("rank", String),
+  Column("tier", String),
+  Column("wins", Integer, nullable=False),
+  Column("losses", Integer, nullable=False),
+  Column("favorite_champion", String),
+  Column("matches_tracked", Integer, nullable=False),
+  Column("win_rate", Float, nullable=False),
+  Column("riot_account_name", String),
+  Column("riot_profile_level", Integer),
+  Column("riot_profile_icon_id", Integer),
+  Column("riot_first_match_timestamp", Integer),
+  Column("riot_years_active", Integer),
+  Column("last_synced_at", DateTime, nullable=False),
+  Column("raw_matches", JSON),
+  Index("ix_riotstats_last_synced_at", "last_synced_at"),
+)
+
+Table(
+  "riotmatch",
+  metadata,
+  Column("id", Integer, primary_key=True),
+  Column("key", String, nullable=False),
+  Column("game", String, nullable=False),
+  Column("match_id", String, nullable=False),
+  Column("content_hash", String, nullable=False),
+  Column("payload", LargeBinary, nullable=False),
+  Column("size_bytes", Integer, nullable=False),
+  Column("created_at", DateTime, nullable=False),
+  Column("last_accessed_at", DateTime, nullable=False),
+  Index("ix_riotmatch_key", "key", unique=True),
+  Index("ix_riotmatch_last_accessed_at", "last_accessed_at"),
+)
+
+Table(
+  "steamachievementpercentages",
+  metadata,
+  Column("id", Integer, primary_key=True),
+  Column("appid", Integer, nullable=False),
+  Column("percentages", JSON),
+  Column("fetched_at", DateTime, nullable=False),
+  Index("ix_steamachievementpercentages_appid", "appid", unique=True),
+)
+
+Table(
+  "steamapp",
+  metadata,
+  Column("id", Integer, primary_key=True),
+  Column("appid", Integer, nullable=False),
+  Column("name", String),
+  Column("genres", JSON),
+  Column("has_store_page", Boolean, nullable=False),
+  Column("last_checked", DateTime, nullable=False),
+  Index("ix_steamapp_appid", "appid", unique=True),
+  Index("ix_steamapp_last_checked", "last_checked"),
+)
+
+Table(
+  "syncjob",
+  metadata,
+  Column("id", Integer, primary_key=True),
+  Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+  Column("provider", String, nullable=False),
+  Column("full", Boolean, nullable=False),
+  Column("status", String, nullable=False),
+  Column("attempts", Integer, nullable=False),
+  Column("error", String),
+  Column("run_after", DateTime, nullable=False),
+  Column("created_at", DateTime, nullable=False),
+  Column("started_at", DateTime),
+  Column("finished_at", DateTime),
+  Index("ix_syncjob_user_id", "user_id"),
+  Index("ix_syncjob_provider", "provider"),
+  Index("ix_syncjob_status", "status"),
+  Index("ix_syncjob_run_after", "run_after"),
+)
@@ -0,0 +1,130 @@
+import importlib.util
+import zlib
+from typing import Any, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+SKIP_CONTENT_TYPES = ("image/", "video/", "audio/", "text/event-stream")
+
+
+def _accepted(accept_encoding: str) -> dict:
+  accepted = {}
+  for part in accept_encoding.split(","):
+    coding, _, params = part.strip().partition(";")
+    quality = 1.0
+    params = params.strip()
+    if params.startswith("q="):
+      try:
+        quality = float(params[2:])
+      except ValueError:
+        quality = 0.0
+    if coding:
+      accepted[coding.strip().lower()] = quality
+  return accepted
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+  """Picks br when the client accepts it and brotli is installed, otherwise gzip, otherwise nothing."""
+  accepted = _accepted(accept_encoding)
+  wildcard = accepted.get("*", 0.0)
+  if BROTLI_AVAILABLE and accepted.get("br", wildcard) > 0:
+    return "br"
+  if accepted.get("gzip", wildcard) > 0:
+    return "gzip"
+  return None
+
+
+class _Compressor:
+  def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+    if encoding == "br":
+      import brotli
+
+      self._brotli: Any = brotli.Compressor(quality=brotli_quality)
+      self._gzip = None
+    else:
+      self._brotli = None
+      self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+  def compress(self, data: bytes) -> bytes:
+    return self._brotli.process(data) if self._brotli else self._gzip.compress(data)
+
+  def finish(self) -> bytes:
+    return self._brotli.finish() if self._brotli else self._gzip.flush()
+
+
+class CompressionMiddleware:
+  """Compresses responses above minimum_size with the best encoding the client accepts (br or gzip)."""
+
+  def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4) -> None:
+    self.app = app
+    self.minimum_size = minimum_size
+    self.gzip_level = gzip_level
+    self.brotli_quality = brotli_quality
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["type"] != "http":
+      await self.app(scope, receive, send)
+      return
+    encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+    if encoding is None:
+      await self.app(scope, receive, send)
+      return
+    responder = _CompressionResponder(self, encoding, send)
+    await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+  def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send) -> None:
+    self.middleware = middleware
+    self.encoding = encoding
+    self._send = send
+    self.initial_message: Message = {}
+    self.started = False
+    self.passthrough = False
+    self.compressor: Optional[_Compressor] = None
+
+  async def send(self, message: Message) -> None:
+    message_type = message["type"]
+    if message_type == "http.response.start":
+      # Held back until the first body chunk decides whether the headers change.
+      self.initial_message = message
+      headers = Headers(raw=message["headers"])
+      content_type = headers.get("content-type", "")
+      self.passthrough = "content-encoding" in headers or content_type.startswith(SKIP_CONTENT_TYPES)
+      return
+    if message_type != "http.response.body":
+      await self._send(message)
+      return
+
+    body = message.get("body", b"")
+    more_body = message.get("more_body", False)
+    if not self.started:
+      self.started = True
+      headers = MutableHeaders(raw=self.initial_message["headers"])
+      if not self.passthrough:
+        headers.add_vary_header("Accept-Encoding")
+      if self.passthrough or (len(body) < self.middleware.minimum_size and not more_body):
+        self.passthrough = True
+        await self._send(self.initial_message)
+        await self._send(message)
+        return
+      self.compressor = _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+      headers["Content-Encoding"] = self.encoding
+      del headers["Content-Length"]
+      body = self.compressor.compress(body)
+      if not more_body:
+        body += self.compressor.finish()
+        headers["Content-Length"] = str(len(body))
+      await self._send(self.initial_message)
+      await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+      return
+
+    if self.passthrough or self.compressor is None:
+      await self._send(message)
+      return
+    body = self.compressor.compress(body)
+    if not more_body:
+      body += self.compressor.finish()
+    await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
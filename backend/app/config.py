@@ -15,11 +15,30 @@ class Settings(BaseSettings):
 
   database_url: str = "sqlite:///./nexus.db"
   sqlite_journal_mode: str = "WAL"
+  sqlite_synchronous: str = "NORMAL"
+  sqlite_busy_timeout_ms: int = 5000
+  sqlite_cache_size_kib: int = 64 * 1024
+  sqlite_mmap_size: int = 256 * 1024 * 1024
+  sqlite_temp_store: str = "MEMORY"
+  sqlite_foreign_keys: bool = False
+  sqlite_optimize_interval_seconds: int = 60 * 60
+  sqlite_checkpoint_interval_seconds: int = 5 * 60
+  db_threadpool_size: int = 40
+  db_auto_migrate: bool = True
 
   session_ttl_days: int = 30
+  session_cache_max_entries: int = 10_000
+  session_cache_ttl_seconds: int = 60
+  session_reap_interval_seconds: int = 15 * 60
+  session_reap_batch_size: int = 500
+  auth_state_ttl_minutes: int = 30
   email_verification_ttl_hours: int = 24
   session_cookie_samesite: str = "lax"
   session_cookie_secure: bool = False
+  recap_cache_max_age_seconds: int = 0
+  response_compression_min_bytes: int = 1024
+  response_gzip_level: int = 6
+  response_brotli_quality: int = 4
 
   smtp_host: Optional[str] = None
   smtp_port: int = 587
@@ -31,6 +50,14 @@ class Settings(BaseSettings):
   steam_api_key: Optional[str] = None
   steam_return_url: str = "http://localhost:8000/api/v1/auth/steam/callback"
   steam_realm: str = "http://localhost:8000"
+  steam_global_achievements_ttl_hours: int = 24
+  steam_global_achievements_stale_hours: int = 24 * 7
+  steam_catalog_ttl_hours: int = 24 * 7
+  steam_catalog_negative_ttl_hours: int = 24 * 30
+  steam_incremental_sync: bool = True
+  steam_profile_batch_window_ms: int = 50
+  steam_profile_prefetch_ttl_seconds: int = 600
+  steam_sync_budget_seconds: float = 30.0
 
   riot_client_id: Optional[str] = None
   riot_client_secret: Optional[str] = None
@@ -44,6 +71,45 @@ class Settings(BaseSettings):
   riot_api_key: Optional[str] = None
   riot_lol_region: str = "euw1"
   riot_match_region: str = "europe"
+  riot_app_rate_limit: str = "20:1,100:120"
+  riot_rate_limit_max_retries: int = 3
+  riot_sync_concurrency: int = 6
+  riot_incremental_sync: bool = True
+  riot_match_store_max_bytes: int = 256 * 1024 * 1024
+
+  sync_workers: int = 4
+  sync_steam_concurrency: int = 2
+  sync_riot_concurrency: int = 2
+  sync_job_max_attempts: int = 3
+  sync_job_retry_seconds: float = 30.0
+  sync_job_poll_seconds: float = 2.0
+  sync_job_stale_seconds: int = 600
+  sync_job_requeue_interval_seconds: float = 60.0
+
+  refresh_enabled: bool = False
+  refresh_max_age_hours: int = 24
+  refresh_interval_seconds: int = 300
+  refresh_rate_per_minute: int = 60
+  refresh_steam_per_minute: int = 40
+  refresh_riot_per_minute: int = 20
+  refresh_page_size: int = 500
+
+  http_timeout: float = 20.0
+  http_connect_timeout: float = 5.0
+  http_max_connections: int = 20
+  http_max_keepalive_connections: int = 10
+  http_keepalive_expiry: float = 30.0
+  http_http2: bool = False
+  steam_store_timeout: float = 10.0
+  upstream_max_retries: int = 2
+  upstream_backoff_base_seconds: float = 0.5
+  upstream_backoff_max_seconds: float = 8.0
+  upstream_retry_after_max_seconds: float = 30.0
+  upstream_breaker_threshold: int = 5
+  upstream_breaker_cooldown_seconds: float = 30.0
+  upstream_hedging: bool = True
+  upstream_override_url: Optional[str] = None
+
   admin_username: str = "admin"
   admin_password: str = "change-me"
   admin_session_secret: str = "change-me-secret"
@@ -1,67 +1,89 @@
 from contextlib import contextmanager
-from typing import Iterator
+from typing import Any, Dict, Iterator, List, Sequence, Type
 
-from sqlalchemy import text
+import orjson
+from sqlalchemy import and_, event, insert, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlmodel import Session, SQLModel, create_engine
 
 from .config import get_settings
-from .models import AuthState, SteamStats, User
 
 settings = get_settings()
-engine = create_engine(settings.database_url, echo=False, connect_args=settings.database_connect_args())
-
-
-def _ensure_auth_state_payload_column() -> None:
-  if engine.dialect.name != "sqlite":
-    return
-
-  table = getattr(AuthState, "__tablename__", "authstate")
-  with engine.begin() as connection:
-    rows = connection.execute(text(f"PRAGMA table_info({table})")).fetchall()
-    columns = {row[1] for row in rows}
-    if "data" not in columns:
-      connection.execute(text(f"ALTER TABLE {table} ADD COLUMN data JSON"))
-
-
-def _ensure_user_columns() -> None:
-  if engine.dialect.name != "sqlite":
+engine = create_engine(
+  settings.database_url,
+  echo=False,
+  connect_args=settings.database_connect_args(),
+  json_serializer=lambda value: orjson.dumps(value).decode("utf-8"),
+  json_deserializer=orjson.loads,
+)
+
+SQLITE_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SQLITE_SYNCHRONOUS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+SQLITE_TEMP_STORE = {"DEFAULT", "FILE", "MEMORY"}
+
+
+def _choice(value: str, allowed: set, name: str) -> str:
+  normalized = value.strip().upper()
+  if normalized not in allowed:
+    raise ValueError(f"Unsupported {name}: {value}")
+  return normalized
+
+
+def sqlite_pragmas() -> list[str]:
+  return [
+    f"PRAGMA journal_mode={_choice(settings.sqlite_journal_mode, SQLITE_JOURNAL_MODES, 'SQLITE_JOURNAL_MODE')}",
+    f"PRAGMA synchronous={_choice(settings.sqlite_synchronous, SQLITE_SYNCHRONOUS, 'SQLITE_SYNCHRONOUS')}",
+    f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}",
+    f"PRAGMA cache_size={-int(settings.sqlite_cache_size_kib)}",
+    f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}",
+    f"PRAGMA temp_store={_choice(settings.sqlite_temp_store, SQLITE_TEMP_STORE, 'SQLITE_TEMP_STORE')}",
+    f"PRAGMA foreign_keys={'ON' if settings.sqlite_foreign_keys else 'OFF'}",
+  ]
+
+
+if engine.dialect.name == "sqlite":
+  _pragmas = sqlite_pragmas()
+
+  @event.listens_for(engine, "connect")
+  def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+      for pragma in _pragmas:
+        cursor.execute(pragma)
+    finally:
+      cursor.close()
+
+
+def upsert(
+  session: Session,
+  model: Type[SQLModel],
+  rows: List[Dict[str, Any]],
+  keys: Sequence[str],
+  columns: Sequence[str],
+  only_changed: bool = False,
+) -> None:
+  """Bulk INSERT ... ON CONFLICT (keys) DO UPDATE of columns; other dialects update row by row."""
+  if not rows:
     return
-
-  table = getattr(User, "__tablename__", "user")
-  with engine.begin() as connection:
-    rows = connection.execute(text(f"PRAGMA table_info({table})")).fetchall()
-    columns = {row[1] for row in rows}
-    if "email" not in columns:
-      connection.execute(text(f"ALTER TABLE {table} ADD COLUMN email TEXT"))
-    if "password_hash" not in columns:
-      connection.execute(text(f"ALTER TABLE {table} ADD COLUMN password_hash TEXT"))
-    if "password_salt" not in columns:
-      connection.execute(text(f"ALTER TABLE {table} ADD COLUMN password_salt TEXT"))
-    if "email_verified" not in columns:
-      connection.execute(text(f"ALTER TABLE {table} ADD COLUMN email_verified BOOLEAN"))
-    if "email_verification_token" not in columns:
-      connection.execute(text(f"ALTER TABLE {table} ADD COLUMN email_verification_token TEXT"))
-    if "email_verification_sent_at" not in columns:
-      connection.execute(text(f"ALTER TABLE {table} ADD COLUMN email_verification_sent_at TIMESTAMP"))
-
-
-def _ensure_steam_stats_columns() -> None:
-  if engine.dialect.name != "sqlite":
+  table = model.__table__
+  dialect = session.get_bind().dialect.name
+  if dialect not in ("sqlite", "postgresql"):
+    for row in rows:
+      match = and_(*[table.c[key] == row[key] for key in keys])
+      result = session.execute(update(table).where(match).values({column: row[column] for column in columns}))
+      if not result.rowcount:
+        session.execute(insert(table).values(row))
     return
-
-  table = getattr(SteamStats, "__tablename__", "steamstats")
-  with engine.begin() as connection:
-    rows = connection.execute(text(f"PRAGMA table_info({table})")).fetchall()
-    columns = {row[1] for row in rows}
-    if "achievements" not in columns:
-      connection.execute(text(f"ALTER TABLE {table} ADD COLUMN achievements JSON"))
-
-
-def init_db() -> None:
-  SQLModel.metadata.create_all(engine)
-  _ensure_auth_state_payload_column()
-  _ensure_user_columns()
-  _ensure_steam_stats_columns()
+  statement = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(table)
+  excluded = statement.excluded
+  where = or_(*[table.c[column].is_distinct_from(excluded[column]) for column in columns]) if only_changed else None
+  statement = statement.on_conflict_do_update(
+    index_elements=[table.c[key] for key in keys],
+    set_={column: excluded[column] for column in columns},
+    where=where,
+  )
+  # One compiled statement run through executemany; the driver batches the rows.
+  session.execute(statement, rows)
 
 
 @contextmanager
@@ -0,0 +1,395 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Pattern, Tuple
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+SECRET_PARAMS = {"key", "api_key"}
+RECORDED_HEADERS = {"content-type", "retry-after", "x-app-rate-limit", "x-method-rate-limit", "x-rate-limit-type"}
+GENRES = ["Action", "Adventure", "RPG", "Strategy", "Indie", "Simulation", "Casual", "Sports", "Racing"]
+CHAMPIONS = ["Ahri", "Garen", "Jinx", "Lux", "Thresh", "Yasuo", "Leona", "Ezreal"]
+TIERS = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "EMERALD", "DIAMOND"]
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+@dataclass
+class FakeUpstreamConfig:
+  latency_ms: float = 0.0
+  jitter_ms: float = 0.0
+  error_rate: float = 0.0
+  rate_limit: str = ""
+  fixtures_dir: Optional[Path] = None
+  record: bool = False
+  seed: int = 0
+  steam_games: int = 200
+  riot_matches: int = 300
+  stats: Dict[str, int] = field(default_factory=lambda: {"requests": 0, "errors": 0, "throttled": 0, "replayed": 0})
+
+
+def _rng(config: FakeUpstreamConfig, *parts: Any) -> random.Random:
+  digest = hashlib.sha1(":".join(str(part) for part in (config.seed, *parts)).encode()).hexdigest()
+  return random.Random(int(digest[:16], 16))
+
+
+def _fixture_path(directory: Path, method: str, host: str, path: str, params: Dict[str, str]) -> Path:
+  query = sorted((key, value) for key, value in params.items() if key not in SECRET_PARAMS)
+  digest = hashlib.sha1(json.dumps([method, path, query]).encode()).hexdigest()[:20]
+  return directory / host / f"{digest}.json"
+
+
+class RateWindow:
+  """Sliding-window request counter emulating Riot's "count:seconds" limits for one host."""
+
+  def __init__(self, spec: str) -> None:
+    self.limits: List[Tuple[int, float]] = []
+    for chunk in spec.split(","):
+      count, _, seconds = chunk.strip().partition(":")
+      if count and seconds:
+        self.limits.append((int(count), float(seconds)))
+    self.hits: Deque[float] = deque()
+
+  def check(self, now: float) -> Tuple[Optional[float], str]:
+    longest = max((seconds for _, seconds in self.limits), default=0.0)
+    while self.hits and now - self.hits[0] > longest:
+      self.hits.popleft()
+    counts = []
+    for count, seconds in self.limits:
+      used = sum(1 for hit in self.hits if now - hit <= seconds)
+      if used >= count:
+        oldest = next(hit for hit in self.hits if now - hit <= seconds)
+        return max(seconds - (now - oldest), 0.0), ""
+      counts.append(f"{used + 1}:{int(seconds)}")
+    self.hits.append(now)
+    return None, ",".join(counts)
+
+
+# --- Steam -----------------------------------------------------------------------------------------
+
+
+def _steam_games(config: FakeUpstreamConfig, steam_id: str) -> List[Dict[str, Any]]:
+  rng = _rng(config, "steam-library", steam_id)
+  games = []
+  for index in range(config.steam_games):
+    appid = 10 * (index + 1)
+    games.append({
+      "appid": appid,
+      "name": f"Fake Game {appid}",
+      "playtime_forever": int(rng.paretovariate(1.2) * 60),
+      "playtime_2weeks": rng.choice([0, 0, 0, rng.randint(1, 900)]),
+      "img_icon_url": hashlib.sha1(str(appid).encode()).hexdigest(),
+      "has_community_visible_stats": True,
+      "rtime_last_played": 1_700_000_000 - rng.randint(0, 10_000_000),
+    })
+  return games
+
+
+def _steam_owned_games(config: FakeUpstreamConfig, request: Request, match: "re.Match[str]") -> Response:
+  games = _steam_games(config, request.query_params.get("steamid", ""))
+  return JSONResponse({"response": {"game_count": len(games), "games": games}})
+
+
+def _steam_player_summaries(config: FakeUpstreamConfig, request: Request, match: "re.Match[str]") -> Response:
+  ids = [item for item in request.query_params.get("steamids", "").split(",") if item]
+  players = [
+    {
+      "steamid": steam_id,
+      "personaname": f"Player {steam_id[-4:]}",
+      "avatarfull": f"https://avatars.example/{steam_id}.jpg",
+      "timecreated": 1_300_000_000 + _rng(config, "created", steam_id).randint(0, 300_000_000),
+    }
+    for steam_id in ids
+  ]
+  return JSONResponse({"response": {"players": players}})
+
+
+def _steam_level(config: FakeUpstreamConfig, request: Request, match: "re.Match[str]") -> Response:
+  level = _rng(config, "level", request.query_params.get("steamid", "")).randint(1, 120)
+  return JSONResponse({"response": {"player_level": level}})
+
+
+def _achievement_names(config: FakeUpstreamConfig, appid: str) -> List[str]:
+  count = _rng(config, "achievements", appid).choice([0, 5, 12, 24, 40])
+  return [f"ACH_{appid}_{index}" for index in range(count)]
+
+
+def _steam_player_achievements(config: FakeUpstreamConfig, request: Request, match: "re.Match[str]") -> Response:
+  appid = request.query_params.get("appid", "")
+  names = _achievement_names(config, appid)
+  if not names:
+    return JSONResponse({"playerstats": {"error": "Requested app has no stats", "success": False}}, status_code=400)
+  rng = _rng(config, "unlocks", request.query_params.get("steamid", ""), appid)
+  achievements = [
+    {"apiname": name, "name": name, "achieved": int(rng.random() < 0.6), "unlocktime": 1_600_000_000 + rng.randint(0, 10**8)}
+    for name in names
+  ]
+  return JSONResponse({"playerstats": {"success": True, "achievements": achievements}})
+
+
+def _steam_global_percentages(config: FakeUpstreamConfig, request: Request, match: "re.Match[str]") -> Response:
+  appid = request.query_params.get("gameid", "")
+  rng = _rng(config, "percentages", appid)
+  achievements = [{"name": name, "percent": round(rng.uniform(0.1, 90), 1)} for name in _achievement_names(config, appid)]
+  return JSONResponse({"achievementpercentages": {"achievements": achievements}})
+
+
+def _steam_app_details(config: FakeUpstreamConfig, request: Request, match: "re.Match[str]") -> Response:
+  appid = request.query_params.get("appids", "")
+  rng = _rng(config, "store", appid)
+  if rng.random() < 0.1:
+    return JSONResponse({appid: {"success": False}})
+  genres = [{"id": str(index), "description": genre} for index, genre in enumerate(rng.sample(GENRES, 2))]
+  return JSONResponse({appid: {"success": True, "data": {"genres": genres}}})
+
+
+def _steam_openid(config: FakeUpstreamConfig, request: Request, match: "re.Match[str]") -> Response:
+  return PlainTextResponse("ns:http://specs.openid.net/auth/2.0\nis_valid:true\n")
+
+
+# --- Riot ------------------------------------------------------------------------------------------
+
+
+def _match_ids(config: FakeUpstreamConfig, request: Request, prefix: str, puuid: str) -> List[str]:
+  start = int(request.query_params.get("start", 0))
+  count = int(request.query_params.get("count", 20))
+  start_time = request.query_params.get("startTime")
+  ids = []
+  for index in range(config.riot_matches):
+    if start_time is not None and _match_started_ms(index) // 1000 < int(start_time):
+      break
+    ids.append(f"{prefix}_{index}_{puuid}")
+  return ids[start:start + count]
+
+
+def _match_started_ms(index: int) -> int:
+  return 1_700_000_000_000 - index * DAY_MS // 3
+
+
+def _riot_summoner(config: FakeUpstreamConfig, request: Request, match: "re.Match[str]") -> Response:
+  puuid = match.group("puuid")
+  rng = _rng(config, "summoner", puuid)
+  return JSONResponse({
+    "id": f"summoner-{puuid}",
+    "puuid": puuid,
+    "summonerLevel": rng.randint(30, 600),
+    "profileIconId": rng.randint(1, 5000),
+  })
+
+
+def _riot_league(config: FakeUpstreamConfig, request: Request, match: "re.Match[str]") -> Response:
+  rng = _rng(config, "league", match.group("summoner"))
+  return JSONResponse([{
+    "queueType": "RANKED_SOLO_5x5",
+    "tier": rng.choice(TIERS),
+    "rank": rng.choice(["I", "II", "III", "IV"]),
+    "wins": rng.randint(0, 300),
+    "losses": rng.randint(0, 300),
+  }])
+
+
+def _riot_account(config: FakeUpstreamConfig, request: Request, match: "re.Match[str]") -> Response:
+  puuid = match.groupdict().get("puuid")
+  if puuid is None:
+    token = request.headers.get("authorization", "")
+    puuid = f"fake-puuid-{hashlib.sha1(token.encode()).hexdigest()[:12]}"
+  return JSONResponse({"puuid": puuid, "gameName": f"Fake{puuid[-4:]}", "tagLine": "FAKE"})
+
+
+def _riot_match_ids(config: FakeUpstreamConfig, request: Request, match: "re.Match[str]") -> Response:
+  prefix = {"lol": "FAKE1", "tft": "FAKETFT", "lor": "FAKELOR"}[match.group("game")]
+  return JSONResponse(_match_ids(config, request, prefix, match.group("puuid")))
+
+
+def _riot_val_matchlist(config: FakeUpstreamConfig, request: Request, match: "re.Match[str]") -> Response:
+  ids = _match_ids(config, request, "FAKEVAL", match.group("puuid"))
+  return JSONResponse({"history": [{"matchId": match_id} for match_id in ids]})
+
+
+def _not_found() -> Response:
+  return JSONResponse({"status": {"message": "Not found", "status_code": 404}}, status_code=404)
+
+
+def _riot_match(config: FakeUpstreamConfig, request: Request, match: "re.Match[str]") -> Response:
+  parts = match.group("match_id").split("_", 2)
+  if len(parts) != 3 or not parts[1].isdigit():
+    # Real ids like EUW1_7123456789 were not handed out by this server, so like Riot it does not know them.
+    return _not_found()
+  _, index, puuid = parts
+  started = _match_started_ms(int(index))
+  rng = _rng(config, "match", match.group("match_id"))
+  participants = [{"puuid": puuid, "win": rng.random() < 0.52, "championName": rng.choice(CHAMPIONS)}]
+  participants += [{"puuid": f"other-{slot}", "win": False, "championName": rng.choice(CHAMPIONS)} for slot in range(9)]
+  info = {"gameStartTimestamp": started, "game_datetime": started, "gameStartTimeMillis": started, "participants": participants}
+  return JSONResponse({"metadata": {"matchId": match.group("match_id")}, "info": info})
+
+
+def _riot_token(config: FakeUpstreamConfig, request: Request, match: "re.Match[str]") -> Response:
+  return JSONResponse({
+    "access_token": f"fake-access-{int(time.time() * 1000)}",
+    "refresh_token": "fake-refresh",
+    "token_type": "Bearer",
+    "expires_in": 3600,
+    "scope": "openid",
+  })
+
+
+Handler = Callable[[FakeUpstreamConfig, Request, "re.Match[str]"], Response]
+
+ROUTES: List[Tuple[Pattern[str], Pattern[str], Handler]] = [
+  (re.compile(r"api\.steampowered\.com"), re.compile(r"/IPlayerService/GetOwnedGames/v0*1/?"), _steam_owned_games),
+  (re.compile(r"api\.steampowered\.com"), re.compile(r"/ISteamUser/GetPlayerSummaries/v0*2/?"), _steam_player_summaries),
+  (re.compile(r"api\.steampowered\.com"), re.compile(r"/IPlayerService/GetSteamLevel/v0*1/?"), _steam_level),
+  (re.compile(r"api\.steampowered\.com"), re.compile(r"/ISteamUserStats/GetPlayerAchievements/v0*1/?"), _steam_player_achievements),
+  (
+    re.compile(r"api\.steampowered\.com"),
+    re.compile(r"/ISteamUserStats/GetGlobalAchievementPercentagesForApp/v0*2/?"),
+    _steam_global_percentages,
+  ),
+  (re.compile(r"store\.steampowered\.com"), re.compile(r"/api/appdetails/?"), _steam_app_details),
+  (re.compile(r"steamcommunity\.com"), re.compile(r"/openid/login/?"), _steam_openid),
+  (re.compile(r".+\.api\.riotgames\.com"), re.compile(r"/lol/summoner/v4/summoners/by-puuid/(?P<puuid>[^/]+)"), _riot_summoner),
+  (re.compile(r".+\.api\.riotgames\.com"), re.compile(r"/lol/league/v4/entries/by-summoner/(?P<summoner>[^/]+)"), _riot_league),
+  (re.compile(r".+\.api\.riotgames\.com"), re.compile(r"/riot/account/v1/accounts/by-puuid/(?P<puuid>[^/]+)"), _riot_account),
+  (re.compile(r".+\.api\.riotgames\.com"), re.compile(r"/riot/account/v1/accounts/me"), _riot_account),
+  (
+    re.compile(r".+\.api\.riotgames\.com"),
+    re.compile(r"/(?P<game>lol|tft|lor)/match/v\d+/matches/by-puuid/(?P<puuid>[^/]+)/ids"),
+    _riot_match_ids,
+  ),
+  (re.compile(r".+\.api\.riotgames\.com"), re.compile(r"/val/match/v1/matchlists/by-puuid/(?P<puuid>[^/]+)"), _riot_val_matchlist),
+  (re.compile(r".+\.api\.riotgames\.com"), re.compile(r"/(?:lol|tft|lor|val)/match/v\d+/matches/(?P<match_id>[^/]+)"), _riot_match),
+  (re.compile(r"auth\.riotgames\.com"), re.compile(r"/token/?"), _riot_token),
+]
+
+
+def _synthetic(config: FakeUpstreamConfig, host: str, request: Request) -> Response:
+  for host_pattern, path_pattern, handler in ROUTES:
+    if not host_pattern.fullmatch(host):
+      continue
+    match = path_pattern.fullmatch(request.url.path)
+    if match:
+      return handler(config, request, match)
+  return _not_found()
+
+
+async def _record(config: FakeUpstreamConfig, client: httpx.AsyncClient, host: str, request: Request, path: Path) -> Response:
+  headers = {key: value for key, value in request.headers.items() if key.lower() not in {"host", "content-length", "accept-encoding"}}
+  upstream = await client.request(
+    request.method,
+    f"https://{host}{request.url.path}",
+    params=list(request.query_params.multi_items()),
+    headers=headers,
+    content=await request.body(),
+  )
+  kept = {key: value for key, value in upstream.headers.items() if key.lower() in RECORDED_HEADERS}
+  if upstream.status_code < 500:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"status": upstream.status_code, "headers": kept, "body": upstream.text}))
+  return Response(upstream.content, status_code=upstream.status_code, headers=kept)
+
+
+def create_fake_upstream(config: Optional[FakeUpstreamConfig] = None) -> Starlette:
+  """ASGI stand-in for every Steam/Riot endpoint the app calls, dispatched on the Host header."""
+  config = config or FakeUpstreamConfig()
+  windows: Dict[str, RateWindow] = {}
+  rng = random.Random(config.seed)
+  recorder = httpx.AsyncClient(timeout=30.0) if config.record else None
+
+  async def handle(request: Request) -> Response:
+    host = (request.headers.get("host") or "").split(":")[0]
+    config.stats["requests"] += 1
+    delay = config.latency_ms + rng.uniform(0, config.jitter_ms)
+    if delay > 0:
+      await asyncio.sleep(delay / 1000)
+
+    rate_headers: Dict[str, str] = {}
+    if config.rate_limit:
+      window = windows.setdefault(host, RateWindow(config.rate_limit))
+      retry_after, counts = window.check(time.monotonic())
+      if retry_after is not None:
+        config.stats["throttled"] += 1
+        return JSONResponse(
+          {"status": {"message": "Rate limit exceeded", "status_code": 429}},
+          status_code=429,
+          headers={"Retry-After": str(max(int(retry_after + 0.999), 1)), "X-Rate-Limit-Type": "application"},
+        )
+      rate_headers = {"X-App-Rate-Limit": config.rate_limit.replace(" ", ""), "X-App-Rate-Limit-Count": counts}
+
+    if config.error_rate and rng.random() < config.error_rate:
+      config.stats["errors"] += 1
+      return JSONResponse({"status": {"message": "Service unavailable", "status_code": 503}}, status_code=503)
+
+    response: Optional[Response] = None
+    if config.fixtures_dir is not None:
+      path = _fixture_path(config.fixtures_dir, request.method, host, request.url.path, dict(request.query_params))
+      if recorder is not None:
+        response = await _record(config, recorder, host, request, path)
+      elif path.exists():
+        config.stats["replayed"] += 1
+        fixture = json.loads(path.read_text())
+        response = Response(fixture["body"], status_code=fixture["status"], headers=fixture["headers"])
+    if response is None:
+      response = _synthetic(config, host, request)
+    response.headers.update(rate_headers)
+    return response
+
+  async def stats(request: Request) -> Response:
+    return JSONResponse(config.stats)
+
+  async def shutdown() -> None:
+    if recorder is not None:
+      await recorder.aclose()
+
+  methods = ["GET", "POST"]
+  return Starlette(
+    routes=[Route("/__fake__/stats", stats), Route("/{path:path}", handle, methods=methods)],
+    on_shutdown=[shutdown],
+  )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+  import uvicorn
+
+  parser = argparse.ArgumentParser(description="Serve synthetic or recorded Steam/Riot responses for local runs and benchmarks.")
+  parser.add_argument("--host", default="127.0.0.1")
+  parser.add_argument("--port", type=int, default=8787)
+  parser.add_argument("--latency-ms", type=float, default=0.0)
+  parser.add_argument("--jitter-ms", type=float, default=0.0)
+  parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503.")
+  parser.add_argument("--rate-limit", default="", help='Riot-style limits per host, e.g. "20:1,100:120".')
+  parser.add_argument("--fixtures", type=Path, default=None, help="Directory of recorded responses to replay.")
+  parser.add_argument("--record", action="store_true", help="Proxy to the real upstreams and save responses to --fixtures.")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--steam-games", type=int, default=200)
+  parser.add_argument("--riot-matches", type=int, default=300)
+  args = parser.parse_args(argv)
+  if args.record and args.fixtures is None:
+    parser.error("--record requires --fixtures")
+
+  config = FakeUpstreamConfig(
+    latency_ms=args.latency_ms,
+    jitter_ms=args.jitter_ms,
+    error_rate=args.error_rate,
+    rate_limit=args.rate_limit,
+    fixtures_dir=args.fixtures,
+    record=args.record,
+    seed=args.seed,
+    steam_games=args.steam_games,
+    riot_matches=args.riot_matches,
+  )
+  uvicorn.run(create_fake_upstream(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+  main()
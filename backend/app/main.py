@@ -1,18 +1,59 @@
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.sessions import SessionMiddleware
 
 from .admin import init_admin
+from .compression import CompressionMiddleware
 from .config import get_settings
-from .database import init_db
+from .migrations import migrate
 from .routes import api_router
+from .services import (
+  achievement_cache,
+  auth_sessions,
+  batching,
+  deadline,
+  match_store,
+  pipeline,
+  singleflight,
+  steam,
+  steam_catalog,
+)
+from .services.auth_sessions import reaper as session_reaper
+from .services.db_maintenance import maintenance as db_maintenance
+from .services.refresh import scheduler as refresh_scheduler
+from .services.sync_jobs import workers as sync_workers
+from .services.riot_limiter import limiter
+from .services.upstream import registry
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+  # Sync routes and offloaded Session work share this pool; size it to the DB connection budget.
+  settings = get_settings()
+  to_thread.current_default_thread_limiter().total_tokens = settings.db_threadpool_size
+  if settings.db_auto_migrate:
+    await run_in_threadpool(migrate)
+  await db_maintenance.start()
+  await session_reaper.start()
+  await sync_workers.start()
+  await refresh_scheduler.start()
+  yield
+  await refresh_scheduler.stop()
+  await sync_workers.stop()
+  await session_reaper.stop()
+  await registry.aclose()
+  await db_maintenance.stop()
 
 
 def create_app() -> FastAPI:
   settings = get_settings()
-  init_db()
 
-  application = FastAPI(title=settings.project_name)
+  application = FastAPI(title=settings.project_name, lifespan=lifespan, default_response_class=ORJSONResponse)
 
   application.add_middleware(
     CORSMiddleware,
@@ -22,11 +63,37 @@ def create_app() -> FastAPI:
     allow_headers=["*"],
   )
   application.add_middleware(SessionMiddleware, secret_key=settings.admin_session_secret)
+  if settings.response_compression_min_bytes > 0:
+    application.add_middleware(
+      CompressionMiddleware,
+      minimum_size=settings.response_compression_min_bytes,
+      gzip_level=settings.response_gzip_level,
+      brotli_quality=settings.response_brotli_quality,
+    )
 
   @application.get("/health", tags=["health"])
   async def health_check():
     return {"status": "ok"}
 
+  @application.get("/metrics", tags=["health"])
+  async def metrics():
+    return {
+      "http": registry.metrics(),
+      "riot_rate_limits": limiter.metrics(),
+      "pipelines": pipeline.metrics(),
+      "riot_match_store": match_store.metrics(),
+      "steam_global_achievements": achievement_cache.metrics(),
+      "steam_catalog": steam_catalog.metrics(),
+      "steam_sync": steam.metrics(),
+      "sync_deadlines": deadline.metrics(),
+      "single_flight": singleflight.metrics(),
+      "batching": batching.metrics(),
+      "sync_jobs": sync_workers.metrics(),
+      "refresh": refresh_scheduler.metrics(),
+      "sqlite": db_maintenance.metrics(),
+      "auth_sessions": auth_sessions.metrics(),
+    }
+
   application.include_router(api_router, prefix=settings.api_v1_prefix)
   init_admin(application)
   return application
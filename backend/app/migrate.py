@@ -0,0 +1,27 @@
+import argparse
+from typing import List, Optional
+
+from .migrations import current_version, migrate, status
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+  parser = argparse.ArgumentParser(description="Apply pending database schema migrations.")
+  parser.add_argument("--status", action="store_true", help="Show the current version and pending migrations, then exit.")
+  parser.add_argument("--target", type=int, default=None, help="Stop at this version instead of the latest.")
+  args = parser.parse_args(argv)
+
+  if args.status:
+    report = status()
+    print(f"schema version {report['current']} (latest {report['latest']})")
+    for line in report["pending"]:
+      print(f"  pending: {line}")
+    return
+
+  applied = migrate(args.target)
+  for migration in applied:
+    print(f"applied {migration.version}: {migration.name}")
+  print(f"schema version {current_version()}")
+
+
+if __name__ == "__main__":
+  main()
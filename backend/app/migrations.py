@@ -0,0 +1,251 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import inspect, insert, or_, select, text, update
+from sqlalchemy.engine import Connection
+
+from . import baseline_schema
+from .database import engine
+from .models import (
+  AuthSession,
+  AuthState,
+  RecapSnapshot,
+  RiotStats,
+  SteamApp,
+  SteamStats,
+  SteamUserAchievement,
+  SteamUserGame,
+  SyncJob,
+  User,
+)
+
+VERSION_TABLE = "schema_version"
+# Arbitrary key for pg_advisory_xact_lock, shared by every process migrating this schema.
+POSTGRES_LOCK_KEY = 0x4E455855
+
+
+@dataclass(frozen=True)
+class Migration:
+  version: int
+  name: str
+  apply: Callable[[Connection], None]
+
+
+def _columns(connection: Connection, table: str) -> set:
+  return {column["name"] for column in inspect(connection).get_columns(table)}
+
+
+def _add_columns(connection: Connection, table: str, columns: List[Tuple[str, str]]) -> None:
+  # Databases created before versioning may already have some of these, so each one is checked.
+  existing = _columns(connection, table)
+  quoted = connection.dialect.identifier_preparer.quote(table)
+  for name, ddl_type in columns:
+    if name not in existing:
+      connection.execute(text(f"ALTER TABLE {quoted} ADD COLUMN {name} {ddl_type}"))
+
+
+def _initial_schema(connection: Connection) -> None:
+  # Pinned DDL, not the current models: fresh databases then replay every later migration like upgraded ones.
+  baseline_schema.metadata.create_all(connection)
+
+
+def _auth_state_data(connection: Connection) -> None:
+  _add_columns(connection, AuthState.__tablename__, [("data", "JSON")])
+
+
+def _user_email_columns(connection: Connection) -> None:
+  _add_columns(
+    connection,
+    User.__tablename__,
+    [
+      ("email", "TEXT"),
+      ("password_hash", "TEXT"),
+      ("password_salt", "TEXT"),
+      ("email_verified", "BOOLEAN"),
+      ("email_verification_token", "TEXT"),
+      ("email_verification_sent_at", "TIMESTAMP"),
+    ],
+  )
+
+
+def _steam_stats_columns(connection: Connection) -> None:
+  _add_columns(
+    connection,
+    SteamStats.__tablename__,
+    [("achievements", "JSON"), ("game_snapshots", "JSON"), ("incomplete_stages", "JSON")],
+  )
+
+
+def _stats_synced_indexes(connection: Connection) -> None:
+  for model in (SteamStats, RiotStats):
+    for index in model.__table__.indexes:
+      if [column.name for column in index.columns] == ["last_synced_at"]:
+        index.create(connection, checkfirst=True)
+
+
+def _auth_expiry_indexes(connection: Connection) -> None:
+  for model, column in ((AuthSession, "expires_at"), (AuthState, "created_at")):
+    for index in model.__table__.indexes:
+      if [indexed.name for indexed in index.columns] == [column]:
+        index.create(connection, checkfirst=True)
+
+
+def _steam_user_games(connection: Connection) -> None:
+  # Seeds the table (and catalog names/genres) from steamstats.raw_games; the next sync fills in the full library.
+  SteamUserGame.__table__.create(connection, checkfirst=True)
+  stats = SteamStats.__table__
+  apps = SteamApp.__table__
+  known_apps = set(connection.execute(select(apps.c.appid)).scalars())
+  rows = connection.execute(
+    select(stats.c.user_id, stats.c.raw_games, stats.c.last_synced_at).where(stats.c.raw_games.is_not(None))
+  ).all()
+  for user_id, raw_games, synced_at in rows:
+    games: Dict[int, Dict[str, object]] = {}
+    for game in raw_games or []:
+      try:
+        appid = int(game.get("appid"))
+      except (TypeError, ValueError):
+        continue
+      games[appid] = {
+        "user_id": user_id,
+        "appid": appid,
+        "playtime_forever": int(game.get("playtime_forever") or 0),
+        "playtime_2weeks": int(game.get("playtime_2weeks") or 0),
+        "last_synced": synced_at,
+      }
+      if game.get("name") and appid not in known_apps:
+        values = {"appid": appid, "name": game["name"], "last_checked": synced_at}
+        if game.get("genres"):
+          values["genres"] = game["genres"]
+        connection.execute(insert(apps).values(**values))
+        known_apps.add(appid)
+    if games:
+      connection.execute(insert(SteamUserGame.__table__), list(games.values()))
+
+
+def _legacy_achievements(raw_games: Optional[list], achievements: Optional[list]) -> List[Tuple[int, Dict[str, object]]]:
+  # The flat list only carries game names; raw_games maps them back to appids.
+  appids = {game.get("name"): game.get("appid") for game in raw_games or [] if game.get("name")}
+  return [(int(appids[entry["game"]]), entry) for entry in achievements or [] if appids.get(entry.get("game"))]
+
+
+def _steam_user_achievements(connection: Connection) -> None:
+  SteamUserAchievement.__table__.create(connection, checkfirst=True)
+  stats = SteamStats.__table__
+  rows = connection.execute(
+    select(stats.c.user_id, stats.c.game_snapshots, stats.c.raw_games, stats.c.achievements)
+    .where(or_(stats.c.game_snapshots.is_not(None), stats.c.achievements.is_not(None)))
+  ).all()
+  for user_id, snapshots, raw_games, flat in rows:
+    entries = [
+      (int(appid), entry)
+      for appid, snapshot in (snapshots or {}).items()
+      for entry in (snapshot or {}).get("achievements") or []
+    ] or _legacy_achievements(raw_games, flat)
+    achievements: Dict[Tuple[int, str], Dict[str, object]] = {}
+    for appid, entry in entries:
+      if not entry.get("name"):
+        continue
+      achievements[(appid, entry["name"])] = {
+        "user_id": user_id,
+        "appid": appid,
+        "api_name": entry["name"],
+        "unlocked_at": None,
+        "global_percent": entry.get("percent"),
+      }
+    if achievements:
+      connection.execute(insert(SteamUserAchievement.__table__), list(achievements.values()))
+
+
+def _slim_game_snapshots(connection: Connection) -> None:
+  # Achievement lists moved to steam_user_achievement in 7; snapshots keep only the playtime fingerprint.
+  stats = SteamStats.__table__
+  rows = connection.execute(select(stats.c.id, stats.c.game_snapshots).where(stats.c.game_snapshots.is_not(None))).all()
+  for stats_id, snapshots in rows:
+    slim = {
+      appid: {"playtime_forever": (snapshot or {}).get("playtime_forever"), "completed": (snapshot or {}).get("completed")}
+      for appid, snapshot in (snapshots or {}).items()
+    }
+    connection.execute(update(stats).where(stats.c.id == stats_id).values(game_snapshots=slim))
+
+
+def _sync_job_stage(connection: Connection) -> None:
+  _add_columns(connection, SyncJob.__tablename__, [("stage", "VARCHAR")])
+
+
+MIGRATIONS: List[Migration] = [
+  Migration(1, "initial schema", _initial_schema),
+  Migration(2, "authstate.data", _auth_state_data),
+  Migration(3, "user email and password columns", _user_email_columns),
+  Migration(4, "steamstats achievement snapshot columns", _steam_stats_columns),
+  Migration(5, "last_synced_at indexes on stats tables", _stats_synced_indexes),
+  Migration(6, "steam_user_game library table", _steam_user_games),
+  Migration(7, "steam_user_achievement table", _steam_user_achievements),
+  Migration(8, "recapsnapshot table", lambda connection: RecapSnapshot.__table__.create(connection, checkfirst=True)),
+  Migration(9, "expiry indexes on authsession and authstate", _auth_expiry_indexes),
+  Migration(10, "drop achievement lists from steamstats.game_snapshots", _slim_game_snapshots),
+  Migration(11, "syncjob.stage", _sync_job_stage),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def _ensure_version_table(connection: Connection) -> None:
+  connection.execute(
+    text(
+      f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+      "version INTEGER NOT NULL PRIMARY KEY, "
+      "name VARCHAR(255) NOT NULL, "
+      "applied_at TIMESTAMP NOT NULL)"
+    )
+  )
+
+
+def _current_version(connection: Connection) -> int:
+  if not inspect(connection).has_table(VERSION_TABLE):
+    return 0
+  return int(connection.execute(text(f"SELECT MAX(version) FROM {VERSION_TABLE}")).scalar() or 0)
+
+
+def _lock(connection: Connection) -> None:
+  # Only one process applies migrations; the others block here and then find nothing left to do.
+  if connection.dialect.name == "sqlite":
+    connection.exec_driver_sql("BEGIN IMMEDIATE")
+  elif connection.dialect.name == "postgresql":
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": POSTGRES_LOCK_KEY})
+
+
+def current_version() -> int:
+  with engine.connect() as connection:
+    return _current_version(connection)
+
+
+def migrate(target: Optional[int] = None) -> List[Migration]:
+  """Applies pending migrations up to target in one locked transaction and returns the ones it ran."""
+  target = LATEST_VERSION if target is None else target
+  if current_version() >= target:
+    return []
+  applied: List[Migration] = []
+  with engine.connect() as connection:
+    _lock(connection)
+    _ensure_version_table(connection)
+    current = _current_version(connection)
+    for migration in MIGRATIONS:
+      if current < migration.version <= target:
+        migration.apply(connection)
+        connection.execute(
+          text(f"INSERT INTO {VERSION_TABLE} (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+          {"version": migration.version, "name": migration.name, "applied_at": datetime.utcnow()},
+        )
+        applied.append(migration)
+    connection.commit()
+  return applied
+
+
+def status() -> Dict[str, object]:
+  current = current_version()
+  return {
+    "current": current,
+    "latest": LATEST_VERSION,
+    "pending": [f"{migration.version} {migration.name}" for migration in MIGRATIONS if migration.version > current],
+  }
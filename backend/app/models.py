@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import JSON, Column
+from sqlalchemy import JSON, Column, Index, LargeBinary, UniqueConstraint
 from sqlmodel import Field, SQLModel
 
 
@@ -22,7 +22,7 @@ class AuthState(SQLModel, table=True):
   id: Optional[int] = Field(default=None, primary_key=True)
   provider: str = Field(index=True)
   value: str = Field(unique=True, index=True)
-  created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+  created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
   user_id: Optional[int] = Field(default=None, foreign_key="user.id")
   data: Optional[dict] = Field(default=None, sa_column=Column(JSON))
 
@@ -41,7 +41,7 @@ class AuthSession(SQLModel, table=True):
   id: Optional[int] = Field(default=None, primary_key=True)
   user_id: int = Field(foreign_key="user.id", index=True)
   token: str = Field(unique=True, index=True)
-  expires_at: datetime
+  expires_at: datetime = Field(index=True)
   created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
 
 
@@ -61,7 +61,9 @@ class SteamStats(SQLModel, table=True):
   achievements: Optional[list] = Field(default=None, sa_column=Column(JSON))
   rare_achievements: Optional[list] = Field(default=None, sa_column=Column(JSON))
   completed_games: Optional[list] = Field(default=None, sa_column=Column(JSON))
-  last_synced_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+  game_snapshots: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+  incomplete_stages: Optional[list] = Field(default=None, sa_column=Column(JSON))
+  last_synced_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
   raw_games: Optional[list] = Field(default=None, sa_column=Column(JSON))
 
 
@@ -80,5 +82,87 @@ class RiotStats(SQLModel, table=True):
   riot_profile_icon_id: Optional[int] = None
   riot_first_match_timestamp: Optional[int] = None
   riot_years_active: Optional[int] = None
-  last_synced_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+  last_synced_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
   raw_matches: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+
+
+class RiotMatch(SQLModel, table=True):
+  id: Optional[int] = Field(default=None, primary_key=True)
+  key: str = Field(unique=True, index=True)
+  game: str
+  match_id: str
+  content_hash: str
+  payload: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+  size_bytes: int = 0
+  created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+  last_accessed_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
+
+
+class SteamAchievementPercentages(SQLModel, table=True):
+  id: Optional[int] = Field(default=None, primary_key=True)
+  appid: int = Field(unique=True, index=True)
+  percentages: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+  fetched_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class SteamApp(SQLModel, table=True):
+  id: Optional[int] = Field(default=None, primary_key=True)
+  appid: int = Field(unique=True, index=True)
+  name: Optional[str] = None
+  genres: Optional[list] = Field(default=None, sa_column=Column(JSON))
+  has_store_page: bool = Field(default=True)
+  last_checked: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
+
+
+class SteamUserGame(SQLModel, table=True):
+  __tablename__ = "steam_user_game"
+  __table_args__ = (
+    UniqueConstraint("user_id", "appid", name="uq_steam_user_game_user_appid"),
+    Index("ix_steam_user_game_user_playtime", "user_id", "playtime_forever"),
+  )
+
+  id: Optional[int] = Field(default=None, primary_key=True)
+  user_id: int = Field(foreign_key="user.id", nullable=False)
+  appid: int = Field(index=True)
+  playtime_forever: int = 0
+  playtime_2weeks: int = 0
+  last_synced: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class SteamUserAchievement(SQLModel, table=True):
+  __tablename__ = "steam_user_achievement"
+  __table_args__ = (
+    UniqueConstraint("user_id", "appid", "api_name", name="uq_steam_user_achievement_user_app_name"),
+    Index("ix_steam_user_achievement_user_percent", "user_id", "global_percent"),
+    Index("ix_steam_user_achievement_user_unlocked", "user_id", "unlocked_at"),
+  )
+
+  id: Optional[int] = Field(default=None, primary_key=True)
+  user_id: int = Field(foreign_key="user.id", nullable=False)
+  appid: int
+  api_name: str
+  unlocked_at: Optional[datetime] = None
+  global_percent: Optional[float] = None
+
+
+class RecapSnapshot(SQLModel, table=True):
+  id: Optional[int] = Field(default=None, primary_key=True)
+  user_id: int = Field(foreign_key="user.id", unique=True, nullable=False)
+  payload: dict = Field(sa_column=Column(JSON, nullable=False))
+  etag: str
+  updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class SyncJob(SQLModel, table=True):
+  id: Optional[int] = Field(default=None, primary_key=True)
+  user_id: int = Field(foreign_key="user.id", index=True)
+  provider: str = Field(index=True)
+  full: bool = Field(default=False)
+  status: str = Field(default="queued", index=True)
+  stage: Optional[str] = None
+  attempts: int = 0
+  error: Optional[str] = None
+  run_after: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
+  created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+  started_at: Optional[datetime] = None
+  finished_at: Optional[datetime] = None
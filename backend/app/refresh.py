@@ -0,0 +1,41 @@
+import argparse
+import asyncio
+from datetime import timedelta
+from typing import List, Optional
+
+from .config import get_settings
+from .migrations import migrate
+from .services import sync_jobs
+from .services.refresh import run_backfill
+
+settings = get_settings()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+  parser = argparse.ArgumentParser(description="Refresh the stalest linked Steam/Riot accounts.")
+  parser.add_argument("--provider", choices=["steam", "riot", "all"], default="all")
+  parser.add_argument("--concurrency", type=int, default=4)
+  parser.add_argument("--max-age-hours", type=float, default=settings.refresh_max_age_hours)
+  parser.add_argument("--limit", type=int, default=None)
+  parser.add_argument("--full", action="store_true", help="Force full (non-incremental) syncs.")
+  parser.add_argument("--dry-run", action="store_true", help="List the accounts that would be refreshed.")
+  args = parser.parse_args(argv)
+
+  if settings.db_auto_migrate:
+    migrate()
+  providers = list(sync_jobs.PROVIDERS) if args.provider == "all" else [args.provider]
+  counts = asyncio.run(
+    run_backfill(
+      providers,
+      timedelta(hours=args.max_age_hours),
+      args.concurrency,
+      args.limit,
+      args.full,
+      args.dry_run,
+    )
+  )
+  print(", ".join(f"{key}={value}" for key, value in counts.items()))
+
+
+if __name__ == "__main__":
+  main()
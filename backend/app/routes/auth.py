@@ -8,15 +8,29 @@ from email.message import EmailMessage
 from secrets import token_urlsafe
 from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse
 from pydantic import BaseModel
+from sqlalchemy import delete
 from sqlmodel import Session, select
 
 from ..config import get_settings
 from ..dependencies import session_dependency
-from ..models import AuthSession, AuthState, RiotStats, RiotToken, SteamStats, User
+from ..models import (
+  AuthSession,
+  AuthState,
+  RiotStats,
+  RiotToken,
+  SteamStats,
+  SteamUserAchievement,
+  SteamUserGame,
+  User,
+)
+from ..services import recap as recap_service
+from ..services.auth_sessions import cache as session_cache
+from ..services.riot_limiter import limiter
+from ..services.upstream import registry
 
 router = APIRouter()
 settings = get_settings()
@@ -98,6 +112,7 @@ def _create_session(session: Session, user: User) -> str:
   expires_at = datetime.utcnow() + timedelta(days=settings.session_ttl_days)
   session.add(AuthSession(user_id=user.id, token=token, expires_at=expires_at))
   session.commit()
+  session_cache.put(token, user.id, expires_at)
   return token
 
 
@@ -133,14 +148,19 @@ def _get_current_user(session: Session, request: Request) -> User | None:
   token = request.cookies.get(SESSION_COOKIE_NAME)
   if not token:
     return None
-  record = session.exec(select(AuthSession).where(AuthSession.token == token)).first()
-  if not record:
-    return None
-  if record.expires_at <= datetime.utcnow():
-    session.delete(record)
-    session.commit()
+  cached = session_cache.get(token)
+  if cached is None:
+    record = session.exec(select(AuthSession).where(AuthSession.token == token)).first()
+    if not record:
+      return None
+    cached = (record.user_id, record.expires_at)
+    session_cache.put(token, *cached)
+  user_id, expires_at = cached
+  if expires_at <= datetime.utcnow():
+    # The reaper deletes the row; here it only stops counting as a login.
+    session_cache.invalidate(token)
     return None
-  return session.get(User, record.user_id)
+  return session.get(User, user_id)
 
 
 @router.get("/providers")
@@ -149,7 +169,7 @@ async def auth_providers():
 
 
 @router.post("/register")
-async def register_account(
+def register_account(
   payload: AuthCredentials,
   response: Response,
   session: Session = Depends(session_dependency),
@@ -180,7 +200,7 @@ async def register_account(
 
 
 @router.post("/login")
-async def login_account(
+def login_account(
   payload: AuthCredentials,
   response: Response,
   session: Session = Depends(session_dependency),
@@ -197,7 +217,7 @@ async def login_account(
 
 
 @router.get("/verify")
-async def verify_account(
+def verify_account(
   token: str,
   session: Session = Depends(session_dependency),
 ):
@@ -224,13 +244,14 @@ async def verify_account(
 
 
 @router.post("/logout")
-async def logout_account(
+def logout_account(
   response: Response,
   request: Request,
   session: Session = Depends(session_dependency),
 ):
   token = request.cookies.get(SESSION_COOKIE_NAME)
   if token:
+    session_cache.invalidate(token)
     record = session.exec(select(AuthSession).where(AuthSession.token == token)).first()
     if record:
       session.delete(record)
@@ -240,7 +261,7 @@ async def logout_account(
 
 
 @router.get("/me")
-async def get_current_account(request: Request, session: Session = Depends(session_dependency)):
+def get_current_account(request: Request, session: Session = Depends(session_dependency)):
   user = _get_current_user(session, request)
   if not user:
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
@@ -256,7 +277,7 @@ async def get_current_account(request: Request, session: Session = Depends(sessi
 
 
 @router.post("/disconnect/{provider}")
-async def disconnect_provider(
+def disconnect_provider(
   provider: str,
   request: Request,
   session: Session = Depends(session_dependency),
@@ -270,6 +291,8 @@ async def disconnect_provider(
     steam_stats = session.exec(select(SteamStats).where(SteamStats.user_id == user.id)).first()
     if steam_stats:
       session.delete(steam_stats)
+    session.execute(delete(SteamUserGame).where(SteamUserGame.user_id == user.id))
+    session.execute(delete(SteamUserAchievement).where(SteamUserAchievement.user_id == user.id))
   elif provider == "riot":
     user.riot_puuid = None
     riot_token = session.exec(select(RiotToken).where(RiotToken.user_id == user.id)).first()
@@ -283,6 +306,8 @@ async def disconnect_provider(
 
   session.add(user)
   session.commit()
+  session_cache.invalidate_user(user.id)
+  recap_service.materialize(session, user.id)
   return {"ok": True}
 
 
@@ -304,6 +329,8 @@ def _consume_state(session: Session, provider: str, value: str) -> AuthState:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired state")
   session.delete(state)
   session.commit()
+  if state.created_at <= datetime.utcnow() - timedelta(minutes=settings.auth_state_ttl_minutes):
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired state")
   return state
 
 
@@ -346,9 +373,8 @@ async def _verify_steam_response(params: dict) -> bool:
     if key.startswith("openid.") and key != "openid.mode":
       payload[key] = value
 
-  async with httpx.AsyncClient() as client:
-    response = await client.post(STEAM_OPENID_ENDPOINT, data=payload)
-    return "is_valid:true" in response.text
+  response = await registry.post(STEAM_OPENID_ENDPOINT, data=payload)
+  return "is_valid:true" in response.text
 
 
 def _upsert_steam_user(session: Session, steam_id: str) -> User:
@@ -385,7 +411,7 @@ def _build_code_challenge(code_verifier: str) -> str:
 
 
 @router.get("/steam/start")
-async def start_steam_login(
+def start_steam_login(
   request: Request,
   next: str | None = None,
   session: Session = Depends(session_dependency),
@@ -422,8 +448,17 @@ async def steam_callback(request: Request, state: str, session: Session = Depend
   if not claimed_id:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing claimed_id")
 
+  user_id, state_data = await run_in_threadpool(_complete_steam_login, session, state, _extract_steam_id(claimed_id))
+  redirect_url = _build_frontend_redirect(
+    state_data.get("next"),
+    "steam",
+    user_id,
+  )
+  return RedirectResponse(redirect_url, status_code=status.HTTP_302_FOUND)
+
+
+def _complete_steam_login(session: Session, state: str, steam_id: str) -> tuple[int, dict]:
   state_record = _consume_state(session, "steam", state)
-  steam_id = _extract_steam_id(claimed_id)
   state_data = state_record.data or {}
   user_id = state_data.get("user_id")
   if user_id:
@@ -433,12 +468,7 @@ async def steam_callback(request: Request, state: str, session: Session = Depend
     user = _link_steam_user(session, user, steam_id)
   else:
     user = _upsert_steam_user(session, steam_id)
-  redirect_url = _build_frontend_redirect(
-    state_data.get("next"),
-    "steam",
-    user.id,
-  )
-  return RedirectResponse(redirect_url, status_code=status.HTTP_302_FOUND)
+  return user.id, state_data
 
 
 def _riot_authorize_url(client_id: str, state: str, code_challenge: str) -> str:
@@ -471,21 +501,19 @@ async def _exchange_riot_code(code: str, code_verifier: str, client_id: str, cli
   else:
     data["client_id"] = client_id
 
-  async with httpx.AsyncClient() as client:
-    response = await client.post(f"{RIOT_AUTH_BASE}/token", data=data, auth=auth)
-    if response.status_code >= 400:
-      raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Failed to exchange Riot code")
-    return response.json()
+  response = await registry.post(f"{RIOT_AUTH_BASE}/token", data=data, auth=auth)
+  if response.status_code >= 400:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Failed to exchange Riot code")
+  return response.json()
 
 
 async def _fetch_riot_profile(access_token: str) -> dict:
   headers = {"Authorization": f"Bearer {access_token}"}
   url = f"https://{settings.riot_region}.api.riotgames.com/riot/account/v1/accounts/me"
-  async with httpx.AsyncClient() as client:
-    response = await client.get(url, headers=headers)
-    if response.status_code >= 400:
-      raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unable to fetch Riot profile")
-    return response.json()
+  response = await limiter.get(url, "account-v1.me", headers=headers)
+  if response.status_code >= 400:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unable to fetch Riot profile")
+  return response.json()
 
 
 def _upsert_riot_user(session: Session, puuid: str) -> User:
@@ -573,7 +601,7 @@ def _start_riot_dev_login(
 
 
 @router.get("/riot/start")
-async def start_riot_login(
+def start_riot_login(
   request: Request,
   next: str | None = None,
   client_id: str | None = None,
@@ -611,7 +639,7 @@ async def riot_callback(code: str | None = None, state: str | None = None, sessi
   if not state:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing state")
 
-  state_record = _consume_state(session, "riot", state)
+  state_record = await run_in_threadpool(_consume_state, session, "riot", state)
   state_data = state_record.data or {}
   code_verifier = state_data.get("code_verifier")
   if not code_verifier:
@@ -625,7 +653,12 @@ async def riot_callback(code: str | None = None, state: str | None = None, sessi
   puuid = profile.get("puuid")
   if not puuid:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Riot profile missing PUUID")
-  user_id = state_data.get("user_id")
+  user_id = await run_in_threadpool(_complete_riot_login, session, state_data.get("user_id"), puuid, token_payload)
+  redirect_url = _build_frontend_redirect(state_data.get("next"), "riot", user_id)
+  return RedirectResponse(redirect_url, status_code=status.HTTP_302_FOUND)
+
+
+def _complete_riot_login(session: Session, user_id: int | None, puuid: str, token_payload: dict) -> int:
   if user_id:
     user = session.get(User, user_id)
     if not user:
@@ -634,5 +667,4 @@ async def riot_callback(code: str | None = None, state: str | None = None, sessi
   else:
     user = _upsert_riot_user(session, puuid)
   _store_riot_tokens(session, user, token_payload)
-  redirect_url = _build_frontend_redirect(state_data.get("next"), "riot", user.id)
-  return RedirectResponse(redirect_url, status_code=status.HTTP_302_FOUND)
+  return user.id
@@ -1,34 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlmodel import Session, select
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse, Response
+from sqlmodel import Session
+
+from ..config import get_settings
 from ..dependencies import session_dependency
-from ..models import RiotStats, SteamStats, User
+from ..models import User
 from ..schemas import UserStats
+from ..services import recap as recap_service
 
 router = APIRouter()
-
-
-def _summarize_genres(raw_games: list[dict], total_hours: float) -> list[dict]:
-  if total_hours <= 0:
-    return []
-  totals: dict[str, float] = {}
-  for game in raw_games:
-    genres = game.get("genres") or []
-    if not genres:
-      continue
-    hours = (game.get("playtime_forever", 0) or 0) / 60
-    if hours <= 0:
-      continue
-    share = hours / len(genres)
-    for genre in genres:
-      if not genre:
-        continue
-      totals[genre] = totals.get(genre, 0.0) + share
-  ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
-  return [
-    {"name": name, "percent": round((hours / total_hours) * 100, 1)}
-    for name, hours in ranked[:3]
-  ]
+settings = get_settings()
 
 
 def _get_user_or_404(session: Session, user_id: int) -> User:
@@ -38,55 +24,51 @@ def _get_user_or_404(session: Session, user_id: int) -> User:
   return user
 
 
-def _compose_stats(user: User, steam: SteamStats | None, riot: RiotStats | None) -> UserStats:
-  stats = UserStats()
-  if steam:
-    stats.top_game = steam.top_game
-    stats.total_hours = steam.total_hours
-    stats.longest_session = max(int(steam.longest_session or 0), 0)
-    stats.steam_persona_name = steam.persona_name
-    stats.steam_avatar_url = steam.avatar_url
-    stats.steam_profile_level = steam.profile_level
-    stats.steam_profile_created_at = steam.profile_created_at
-    raw_games = steam.raw_games or []
-    top_games = sorted(raw_games, key=lambda game: game.get("playtime_forever", 0), reverse=True)
-    stats.steam_top_games = [
-      {
-        "name": game.get("name") or "Unknown",
-        "appid": int(game.get("appid")) if game.get("appid") is not None else None,
-        "hours": round((game.get("playtime_forever", 0) or 0) / 60, 1),
-      }
-      for game in top_games[:5]
-    ]
-    stats.steam_top_genres = _summarize_genres(raw_games, stats.total_hours)
-    stats.steam_games_count = steam.games_count
-    stats.steam_recent_hours = steam.recent_hours
-    stats.steam_achievements = steam.achievements or []
-    stats.steam_rare_achievements = steam.rare_achievements or []
-    stats.steam_completed_games = steam.completed_games or []
-  if riot:
-    stats.riot_rank = riot.rank
-    stats.riot_wins = riot.wins
-    stats.riot_losses = riot.losses
-    stats.riot_favorite = riot.favorite_champion
-    stats.riot_win_rate = riot.win_rate
-    stats.playstyle = riot.favorite_champion or stats.playstyle
-    stats.riot_account_name = riot.riot_account_name
-    stats.riot_profile_level = riot.riot_profile_level
-    stats.riot_profile_icon_id = riot.riot_profile_icon_id
-    stats.riot_first_match_timestamp = riot.riot_first_match_timestamp
-    stats.riot_years_active = riot.riot_years_active
-  return stats
+def _not_modified(request: Request, view: recap_service.RecapView, etag: str) -> bool:
+  if_none_match = request.headers.get("if-none-match")
+  if if_none_match is not None:
+    tags = {tag.strip().removeprefix("W/").strip('"') for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+  if_modified_since = request.headers.get("if-modified-since")
+  if if_modified_since:
+    try:
+      since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+      return False
+    if since.tzinfo is None:
+      since = since.replace(tzinfo=timezone.utc)
+    return view.updated_at.replace(tzinfo=timezone.utc, microsecond=0) <= since
+  return False
 
 
-@router.get("")
-async def get_recap(user_id: int = Query(..., ge=1), session: Session = Depends(session_dependency)) -> UserStats:
+@router.get("", response_model=UserStats)
+def get_recap(
+  request: Request,
+  user_id: int = Query(..., ge=1),
+  fields: Optional[str] = Query(None, description="Comma-separated UserStats fields; a trailing * matches a prefix."),
+  include: Optional[str] = Query(None, description=f"Comma-separated sections: {', '.join(recap_service.SECTIONS)}."),
+  session: Session = Depends(session_dependency),
+) -> Response:
+  try:
+    selected = recap_service.resolve_fields(fields, include)
+  except ValueError as exc:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
   user = _get_user_or_404(session, user_id)
-  steam_stats = session.exec(select(SteamStats).where(SteamStats.user_id == user.id)).first()
-  riot_stats = session.exec(select(RiotStats).where(RiotStats.user_id == user.id)).first()
-  if not steam_stats and not riot_stats:
+  view = recap_service.load(session, user.id, selected)
+  if view is None:
     raise HTTPException(
       status_code=status.HTTP_404_NOT_FOUND,
       detail="No stats available. Sync at least one provider.",
     )
-  return _compose_stats(user, steam_stats, riot_stats)
+  etag = view.etag
+  if selected is not None:
+    etag += "-" + hashlib.sha1(",".join(sorted(selected)).encode("utf-8")).hexdigest()[:8]
+  # Weak: the tag identifies the JSON content, while the bytes differ per gzip/br/identity coding.
+  headers = {
+    "ETag": f'W/"{etag}"',
+    "Last-Modified": format_datetime(view.updated_at.replace(tzinfo=timezone.utc), usegmt=True),
+    "Cache-Control": f"private, max-age={settings.recap_cache_max_age_seconds}, must-revalidate",
+  }
+  if _not_modified(request, view, etag):
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+  return ORJSONResponse(view.payload, headers=headers)
@@ -2,9 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session
 
 from ..dependencies import session_dependency
-from ..models import User
-from ..services import riot as riot_service
-from ..services import steam as steam_service
+from ..models import SyncJob, User
+from ..schemas import SyncJobOut
+from ..services import sync_jobs
 
 router = APIRouter()
 
@@ -16,15 +16,18 @@ def _get_user(session: Session, user_id: int) -> User:
   return user
 
 
-@router.post("/steam")
-async def sync_steam_profile(user_id: int, session: Session = Depends(session_dependency)):
-  user = _get_user(session, user_id)
-  stats = await steam_service.sync_user(session, user)
-  return {"provider": "steam", "status": "completed", "stats": stats}
+@router.get("/jobs/{job_id}", response_model=SyncJobOut)
+def get_sync_job(job_id: int, session: Session = Depends(session_dependency)):
+  job = session.get(SyncJob, job_id)
+  if not job:
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sync job not found")
+  return sync_jobs.job_payload(job)
 
 
-@router.post("/riot")
-async def sync_riot_profile(user_id: int, session: Session = Depends(session_dependency)):
+@router.post("/{provider}", status_code=status.HTTP_202_ACCEPTED, response_model=SyncJobOut)
+def enqueue_sync(provider: str, user_id: int, full: bool = False, session: Session = Depends(session_dependency)):
+  if provider not in sync_jobs.PROVIDERS:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported provider")
   user = _get_user(session, user_id)
-  stats = await riot_service.sync_user(session, user)
-  return {"provider": "riot", "status": "completed", "stats": stats}
+  job = sync_jobs.enqueue(session, user.id, provider, full=full)
+  return sync_jobs.job_payload(job)
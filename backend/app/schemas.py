@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
 
 
 class SteamTopGame(BaseModel):
@@ -11,6 +13,7 @@ class SteamAchievement(BaseModel):
   game: str
   name: str
   percent: float | None = None
+  unlocked_at: int | None = None
 
 
 class SteamCompletedGame(BaseModel):
@@ -25,6 +28,9 @@ class SteamTopGenre(BaseModel):
 
 
 class UserStats(BaseModel):
+  # Sections are assigned as plain dicts while composing; validating them keeps serialization on the typed path.
+  model_config = ConfigDict(validate_assignment=True)
+
   year: int = 2024
   top_game: str | None = None
   total_hours: float = 0
@@ -38,9 +44,11 @@ class UserStats(BaseModel):
   steam_top_genres: list[SteamTopGenre] = []
   steam_achievements: list[SteamAchievement] = []
   steam_rare_achievements: list[SteamAchievement] = []
+  steam_year_achievements: list[SteamAchievement] = []
   steam_completed_games: list[SteamCompletedGame] = []
   steam_games_count: int = 0
   steam_recent_hours: float = 0
+  steam_incomplete_stages: list[str] = []
   riot_rank: str | None = None
   riot_wins: int = 0
   riot_losses: int = 0
@@ -51,3 +59,16 @@ class UserStats(BaseModel):
   riot_profile_icon_id: int | None = None
   riot_first_match_timestamp: int | None = None
   riot_years_active: int | None = None
+
+
+class SyncJobOut(BaseModel):
+  job_id: int
+  provider: str
+  user_id: int
+  status: str
+  stage: str | None = None
+  attempts: int = 0
+  error: str | None = None
+  created_at: datetime
+  started_at: datetime | None = None
+  finished_at: datetime | None = None
@@ -0,0 +1,137 @@
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from ..config import get_settings
+from ..database import get_session
+from ..models import SteamAchievementPercentages
+
+settings = get_settings()
+MEMORY_CACHE_SIZE = 2048
+
+Percentages = Dict[str, float]
+Fetcher = Callable[[int], Awaitable[Optional[Percentages]]]
+
+_memory: "OrderedDict[int, Tuple[Percentages, datetime]]" = OrderedDict()
+_refreshing: Set[int] = set()
+_background: Set["asyncio.Task[Any]"] = set()
+_stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_failures": 0}
+
+
+def _remember(appid: int, percentages: Percentages, fetched_at: datetime) -> None:
+  _memory[appid] = (percentages, fetched_at)
+  _memory.move_to_end(appid)
+  while len(_memory) > MEMORY_CACHE_SIZE:
+    _memory.popitem(last=False)
+
+
+def _ttl() -> timedelta:
+  return timedelta(hours=settings.steam_global_achievements_ttl_hours)
+
+
+def _fresh_in_memory(appid: int) -> Optional[Tuple[Percentages, datetime]]:
+  cached = _memory.get(appid)
+  if cached is not None and datetime.utcnow() - cached[1] < _ttl():
+    _memory.move_to_end(appid)
+    return cached
+  return None
+
+
+def _read(appid: int) -> Optional[Tuple[Percentages, datetime]]:
+  with get_session() as session:
+    record = session.exec(
+      select(SteamAchievementPercentages).where(SteamAchievementPercentages.appid == appid)
+    ).first()
+    if not record:
+      return None
+    return record.percentages or {}, record.fetched_at
+
+
+def _write(appid: int, percentages: Percentages, fetched_at: datetime) -> None:
+  with get_session() as session:
+    record = session.exec(
+      select(SteamAchievementPercentages).where(SteamAchievementPercentages.appid == appid)
+    ).first()
+    if not record:
+      record = SteamAchievementPercentages(appid=appid)
+    record.percentages = percentages
+    record.fetched_at = fetched_at
+    session.add(record)
+    try:
+      session.commit()
+    except IntegrityError:
+      session.rollback()
+
+
+async def _load(appid: int) -> Optional[Tuple[Percentages, datetime]]:
+  cached = _fresh_in_memory(appid)
+  if cached is not None:
+    return cached
+  # The memory LRU is only touched on the loop; the threadpool does the SELECT.
+  stored = await run_in_threadpool(_read, appid)
+  if stored is None:
+    return None
+  _remember(appid, *stored)
+  return stored
+
+
+async def _store(appid: int, percentages: Percentages) -> None:
+  fetched_at = datetime.utcnow()
+  await run_in_threadpool(_write, appid, percentages, fetched_at)
+  _remember(appid, percentages, fetched_at)
+
+
+async def _refresh(appid: int, fetch: Fetcher) -> Optional[Percentages]:
+  _stats["refreshes"] += 1
+  percentages = await fetch(appid)
+  if percentages is None:
+    _stats["refresh_failures"] += 1
+    return None
+  await _store(appid, percentages)
+  return percentages
+
+
+async def _refresh_in_background(appid: int, fetch: Fetcher) -> None:
+  try:
+    await _refresh(appid, fetch)
+  except Exception:
+    _stats["refresh_failures"] += 1
+  finally:
+    _refreshing.discard(appid)
+
+
+def _schedule_refresh(appid: int, fetch: Fetcher) -> None:
+  if appid in _refreshing:
+    return
+  _refreshing.add(appid)
+  task = asyncio.ensure_future(_refresh_in_background(appid, fetch))
+  _background.add(task)
+  task.add_done_callback(_background.discard)
+
+
+async def get_percentages(appid: int, fetch: Fetcher) -> Optional[Percentages]:
+  cached = await _load(appid)
+  if cached is not None:
+    percentages, fetched_at = cached
+    age = datetime.utcnow() - fetched_at
+    ttl = _ttl()
+    if age < ttl:
+      _stats["hits"] += 1
+      return percentages
+    if age < ttl + timedelta(hours=settings.steam_global_achievements_stale_hours):
+      _stats["stale_hits"] += 1
+      _schedule_refresh(appid, fetch)
+      return percentages
+  _stats["misses"] += 1
+  return await _refresh(appid, fetch)
+
+
+def metrics() -> Dict[str, Any]:
+  payload: Dict[str, Any] = dict(_stats)
+  payload["memory_entries"] = len(_memory)
+  return payload
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete
+from sqlmodel import select
+
+from ..config import get_settings
+from ..database import get_session
+from ..models import AuthSession, AuthState
+
+settings = get_settings()
+
+
+class SessionCache:
+  """Bounded LRU of session token -> (user_id, expires_at), each entry trusted for a short TTL."""
+
+  def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+    self.max_entries = max_entries
+    self.ttl_seconds = ttl_seconds
+    self._entries: "OrderedDict[str, Tuple[int, datetime, float]]" = OrderedDict()
+    self._lock = threading.Lock()
+    self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+  def get(self, token: str) -> Optional[Tuple[int, datetime]]:
+    with self._lock:
+      entry = self._entries.get(token)
+      if entry is None or entry[2] <= time.monotonic():
+        if entry is not None:
+          del self._entries[token]
+        self._stats["misses"] += 1
+        return None
+      self._entries.move_to_end(token)
+      self._stats["hits"] += 1
+      return entry[0], entry[1]
+
+  def put(self, token: str, user_id: int, expires_at: datetime) -> None:
+    if self.max_entries <= 0 or self.ttl_seconds <= 0:
+      return
+    with self._lock:
+      self._entries[token] = (user_id, expires_at, time.monotonic() + self.ttl_seconds)
+      self._entries.move_to_end(token)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+        self._stats["evictions"] += 1
+
+  def invalidate(self, token: str) -> None:
+    with self._lock:
+      if self._entries.pop(token, None) is not None:
+        self._stats["invalidations"] += 1
+
+  def invalidate_user(self, user_id: int) -> None:
+    with self._lock:
+      tokens = [token for token, entry in self._entries.items() if entry[0] == user_id]
+      for token in tokens:
+        del self._entries[token]
+      self._stats["invalidations"] += len(tokens)
+
+  def metrics(self) -> Dict[str, Any]:
+    with self._lock:
+      payload: Dict[str, Any] = dict(self._stats)
+      payload["size"] = len(self._entries)
+    return payload
+
+
+def _reap_batch(model: Any, column: Any, cutoff: datetime, batch_size: int) -> int:
+  with get_session() as session:
+    ids = session.exec(select(model.id).where(column <= cutoff).limit(batch_size)).all()
+    if ids:
+      session.execute(delete(model).where(model.id.in_(ids)))
+      session.commit()
+    return len(ids)
+
+
+class SessionReaper:
+  """Deletes expired AuthSession and abandoned AuthState rows in small batches on a timer."""
+
+  def __init__(self) -> None:
+    self._task: Optional["asyncio.Task[None]"] = None
+    self._stats: Dict[str, Any] = {"runs": 0, "sessions_deleted": 0, "states_deleted": 0, "errors": 0}
+
+  async def start(self) -> None:
+    if settings.session_reap_interval_seconds > 0 and self._task is None:
+      self._task = asyncio.create_task(self._loop())
+
+  async def stop(self) -> None:
+    if self._task is None:
+      return
+    self._task.cancel()
+    await asyncio.gather(self._task, return_exceptions=True)
+    self._task = None
+
+  async def _loop(self) -> None:
+    while True:
+      try:
+        await self.reap()
+      except Exception:
+        self._stats["errors"] += 1
+      await asyncio.sleep(settings.session_reap_interval_seconds)
+
+  async def _reap(self, model: Any, column: Any, cutoff: datetime) -> int:
+    deleted = 0
+    while True:
+      count = await run_in_threadpool(_reap_batch, model, column, cutoff, settings.session_reap_batch_size)
+      deleted += count
+      if count < settings.session_reap_batch_size:
+        return deleted
+      # Yield between batches so request handlers get the write lock.
+      await asyncio.sleep(0)
+
+  async def reap(self) -> Dict[str, int]:
+    now = datetime.utcnow()
+    sessions = await self._reap(AuthSession, AuthSession.expires_at, now)
+    states = await self._reap(AuthState, AuthState.created_at, now - timedelta(minutes=settings.auth_state_ttl_minutes))
+    self._stats["runs"] += 1
+    self._stats["sessions_deleted"] += sessions
+    self._stats["states_deleted"] += states
+    self._stats["last_run_at"] = time.time()
+    return {"sessions": sessions, "states": states}
+
+  def metrics(self) -> Dict[str, Any]:
+    payload = dict(self._stats)
+    payload["enabled"] = self._task is not None
+    return payload
+
+
+cache = SessionCache(settings.session_cache_max_entries, settings.session_cache_ttl_seconds)
+reaper = SessionReaper()
+
+
+def metrics() -> Dict[str, Any]:
+  return {"cache": cache.metrics(), "reaper": reaper.metrics()}
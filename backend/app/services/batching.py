@@ -0,0 +1,95 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Set, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_batchers: Dict[str, "MicroBatcher[Any, Any]"] = {}
+
+
+class MicroBatcher(Generic[K, V]):
+  """Collects keys for a short window and resolves them with one bulk call per max_size keys."""
+
+  def __init__(
+    self,
+    name: str,
+    fetch_many: Callable[[List[K]], Awaitable[Dict[K, V]]],
+    max_size: int,
+    window: float,
+  ) -> None:
+    self.name = name
+    self._fetch_many = fetch_many
+    self._max_size = max_size
+    self._window = window
+    self._pending: Dict[K, "asyncio.Future[Optional[V]]"] = {}
+    self._timer: Optional["asyncio.Task[None]"] = None
+    self._running: Set["asyncio.Task[None]"] = set()
+    self._primed: Dict[K, Tuple[Optional[V], float]] = {}
+    self._stats = {"keys": 0, "batches": 0, "primed": 0, "primed_hits": 0}
+    _batchers[name] = self
+
+  def prime(self, values: Dict[K, Optional[V]], ttl: float) -> None:
+    """Stores results fetched in bulk elsewhere; each is handed to one load() within ttl seconds."""
+    now = time.monotonic()
+    self._primed = {key: entry for key, entry in self._primed.items() if entry[1] > now}
+    for key, value in values.items():
+      self._primed[key] = (value, now + ttl)
+    self._stats["primed"] += len(values)
+
+  def is_primed(self, key: K) -> bool:
+    primed = self._primed.get(key)
+    return primed is not None and primed[0] is not None and primed[1] > time.monotonic()
+
+  async def load(self, key: K) -> Optional[V]:
+    primed = self._primed.pop(key, None)
+    # A primed None only means the bulk call left the key out, so it is looked up again.
+    if primed is not None and primed[0] is not None and primed[1] > time.monotonic():
+      self._stats["primed_hits"] += 1
+      return primed[0]
+    future = self._pending.get(key)
+    if future is None:
+      future = asyncio.get_running_loop().create_future()
+      self._pending[key] = future
+      self._stats["keys"] += 1
+      if len(self._pending) >= self._max_size:
+        self._dispatch()
+      elif self._timer is None:
+        self._timer = asyncio.ensure_future(self._flush_later())
+    return await asyncio.shield(future)
+
+  async def _flush_later(self) -> None:
+    await asyncio.sleep(self._window)
+    self._timer = None
+    if self._pending:
+      self._dispatch()
+
+  def _dispatch(self) -> None:
+    batch = self._pending
+    self._pending = {}
+    self._stats["batches"] += 1
+    task = asyncio.ensure_future(self._resolve(batch))
+    self._running.add(task)
+    task.add_done_callback(self._running.discard)
+
+  async def _resolve(self, batch: Dict[K, "asyncio.Future[Optional[V]]"]) -> None:
+    try:
+      results = await self._fetch_many(list(batch))
+    except Exception as exc:
+      for future in batch.values():
+        if not future.done():
+          future.set_exception(exc)
+          future.exception()
+      return
+    for key, future in batch.items():
+      if not future.done():
+        future.set_result(results.get(key))
+
+  def metrics(self) -> Dict[str, Any]:
+    payload: Dict[str, Any] = dict(self._stats)
+    payload["avg_batch_size"] = round(self._stats["keys"] / self._stats["batches"], 2) if self._stats["batches"] else 0
+    return payload
+
+
+def metrics() -> Dict[str, Dict[str, Any]]:
+  return {name: batcher.metrics() for name, batcher in _batchers.items()}
@@ -0,0 +1,83 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from ..config import get_settings
+from ..database import engine
+
+settings = get_settings()
+
+
+def _optimize() -> None:
+  with engine.connect() as connection:
+    connection.execute(text("PRAGMA optimize"))
+
+
+def _checkpoint() -> List[int]:
+  with engine.connect() as connection:
+    row = connection.execute(text("PRAGMA wal_checkpoint(PASSIVE)")).one()
+  return [int(value) for value in row]
+
+
+class SqliteMaintenance:
+  """Background PRAGMA optimize and WAL checkpoints so the -wal file stays short under steady writes."""
+
+  def __init__(self) -> None:
+    self._tasks: List["asyncio.Task[None]"] = []
+    self._stats: Dict[str, Any] = {"optimize_runs": 0, "checkpoints": 0, "checkpoint_busy": 0, "errors": 0}
+
+  def _enabled(self) -> bool:
+    return engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:")
+
+  async def start(self) -> None:
+    if not self._enabled():
+      return
+    if settings.sqlite_optimize_interval_seconds > 0:
+      self._tasks.append(asyncio.create_task(self._every(settings.sqlite_optimize_interval_seconds, self.optimize)))
+    if settings.sqlite_checkpoint_interval_seconds > 0 and settings.sqlite_journal_mode.upper() == "WAL":
+      self._tasks.append(asyncio.create_task(self._every(settings.sqlite_checkpoint_interval_seconds, self.checkpoint)))
+
+  async def stop(self) -> None:
+    for task in self._tasks:
+      task.cancel()
+    await asyncio.gather(*self._tasks, return_exceptions=True)
+    self._tasks.clear()
+    if self._enabled():
+      await self.optimize()
+
+  async def _every(self, seconds: float, job: Callable[[], Awaitable[Any]]) -> None:
+    while True:
+      await asyncio.sleep(seconds)
+      await job()
+
+  async def optimize(self) -> None:
+    try:
+      await run_in_threadpool(_optimize)
+    except Exception:
+      self._stats["errors"] += 1
+      return
+    self._stats["optimize_runs"] += 1
+    self._stats["last_optimize_at"] = time.time()
+
+  async def checkpoint(self) -> Optional[List[int]]:
+    try:
+      busy, wal_pages, checkpointed = await run_in_threadpool(_checkpoint)
+    except Exception:
+      self._stats["errors"] += 1
+      return None
+    self._stats["checkpoints"] += 1
+    self._stats["checkpoint_busy"] += busy
+    self._stats["last_wal_pages"] = wal_pages
+    self._stats["last_checkpointed_pages"] = checkpointed
+    return [busy, wal_pages, checkpointed]
+
+  def metrics(self) -> Dict[str, Any]:
+    payload = dict(self._stats)
+    payload["enabled"] = bool(self._tasks)
+    return payload
+
+
+maintenance = SqliteMaintenance()
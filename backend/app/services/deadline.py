@@ -0,0 +1,71 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+_current: ContextVar[Optional["Deadline"]] = ContextVar("sync_deadline", default=None)
+_stage_stats: Dict[str, Dict[str, int]] = {}
+
+
+class Deadline:
+  """Time budget shared by every stage of one sync; stages that overrun it are recorded as incomplete."""
+
+  def __init__(self, seconds: float) -> None:
+    self.expires_at = time.monotonic() + seconds
+    self.incomplete: List[str] = []
+
+  def remaining(self) -> float:
+    return max(self.expires_at - time.monotonic(), 0.0)
+
+  @property
+  def expired(self) -> bool:
+    return self.remaining() <= 0
+
+  def mark_incomplete(self, stage: str) -> None:
+    if stage not in self.incomplete:
+      self.incomplete.append(stage)
+    _stage_stats.setdefault(stage, {"timeouts": 0})["timeouts"] += 1
+
+
+@contextmanager
+def budget(seconds: float) -> Iterator[Deadline]:
+  deadline = Deadline(seconds)
+  token = _current.set(deadline)
+  try:
+    yield deadline
+  finally:
+    _current.reset(token)
+
+
+def current() -> Optional[Deadline]:
+  return _current.get()
+
+
+def remaining(default: Optional[float] = None) -> Optional[float]:
+  deadline = _current.get()
+  return deadline.remaining() if deadline else default
+
+
+def mark_incomplete(stage: str) -> None:
+  deadline = _current.get()
+  if deadline is not None:
+    deadline.mark_incomplete(stage)
+
+
+async def within(stage: str, awaitable: Awaitable[T], default: T) -> T:
+  """Awaits a stage within the current budget, returning default (and marking the stage) on timeout."""
+  deadline = _current.get()
+  if deadline is None:
+    return await awaitable
+  try:
+    return await asyncio.wait_for(awaitable, timeout=deadline.remaining())
+  except asyncio.TimeoutError:
+    deadline.mark_incomplete(stage)
+    return default
+
+
+def metrics() -> Dict[str, Dict[str, Any]]:
+  return {stage: dict(entry) for stage, entry in _stage_stats.items()}
@@ -0,0 +1,148 @@
+import hashlib
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from ..config import get_settings
+from ..database import get_session
+from ..models import RiotMatch
+
+settings = get_settings()
+ACCESS_TOUCH_INTERVAL = timedelta(hours=1)
+EVICTION_BATCH_SIZE = 200
+TOTAL_RECHECK_SECONDS = 60.0
+
+_stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+# This process's estimate: the table total at the last check plus its own writes since.
+_total_bytes: Optional[int] = None
+_total_checked_at = 0.0
+_write_lock = threading.Lock()
+
+
+def _enabled() -> bool:
+  return settings.riot_match_store_max_bytes > 0
+
+
+def _key(game: str, match_id: str) -> str:
+  return f"{game}:{match_id}"
+
+
+def _encode(payload: Dict[str, Any]) -> bytes:
+  return zlib.compress(orjson.dumps(payload))
+
+
+def _decode(blob: bytes) -> Dict[str, Any]:
+  return orjson.loads(zlib.decompress(blob))
+
+
+def _is_complete(payload: Any) -> bool:
+  return isinstance(payload, dict) and bool(payload.get("info"))
+
+
+def get(game: str, match_id: str) -> Optional[Dict[str, Any]]:
+  with get_session() as session:
+    record = session.exec(select(RiotMatch).where(RiotMatch.key == _key(game, match_id))).first()
+    if not record:
+      return None
+    now = datetime.utcnow()
+    if now - record.last_accessed_at >= ACCESS_TOUCH_INTERVAL:
+      record.last_accessed_at = now
+      session.add(record)
+      session.commit()
+    return _decode(record.payload)
+
+
+def put(game: str, match_id: str, payload: Dict[str, Any]) -> None:
+  blob = _encode(payload)
+  with _write_lock:
+    _put(game, match_id, blob)
+
+
+def _put(game: str, match_id: str, blob: bytes) -> None:
+  global _total_bytes
+  with get_session() as session:
+    key = _key(game, match_id)
+    if session.exec(select(RiotMatch.id).where(RiotMatch.key == key)).first():
+      return
+    session.add(
+      RiotMatch(
+        key=key,
+        game=game,
+        match_id=match_id,
+        content_hash=hashlib.sha256(blob).hexdigest(),
+        payload=blob,
+        size_bytes=len(blob),
+      )
+    )
+    try:
+      session.commit()
+    except IntegrityError:
+      session.rollback()
+      return
+  _stats["stored"] += 1
+  if _total_bytes is not None:
+    _total_bytes += len(blob)
+  # Other processes write too, so the real total is re-read whenever the estimate is over or getting old.
+  if (
+    _total_bytes is None
+    or _total_bytes > settings.riot_match_store_max_bytes
+    or time.monotonic() - _total_checked_at >= TOTAL_RECHECK_SECONDS
+  ):
+    evict()
+
+
+def evict() -> None:
+  """Deletes the least recently used matches until SUM(size_bytes) over the whole table is within the cap."""
+  global _total_bytes, _total_checked_at
+  limit = settings.riot_match_store_max_bytes
+  with get_session() as session:
+    total = int(session.exec(select(func.coalesce(func.sum(RiotMatch.size_bytes), 0))).one())
+    while total > limit:
+      oldest = session.exec(
+        select(RiotMatch.id, RiotMatch.size_bytes)
+        .order_by(RiotMatch.last_accessed_at, RiotMatch.id)
+        .limit(EVICTION_BATCH_SIZE)
+      ).all()
+      if not oldest:
+        total = 0
+        break
+      ids = []
+      for record_id, size_bytes in oldest:
+        if total <= limit:
+          break
+        ids.append(record_id)
+        total -= size_bytes
+      result = session.execute(delete(RiotMatch).where(RiotMatch.id.in_(ids)))
+      session.commit()
+      _stats["evicted"] += result.rowcount
+  _total_bytes = total
+  _total_checked_at = time.monotonic()
+
+
+async def read_through(game: str, match_id: str, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+  if not _enabled():
+    return await fetch()
+  cached = await run_in_threadpool(get, game, match_id)
+  if cached is not None:
+    _stats["hits"] += 1
+    return cached
+  _stats["misses"] += 1
+  payload = await fetch()
+  if _is_complete(payload):
+    await run_in_threadpool(put, game, match_id, payload)
+  return payload
+
+
+def metrics() -> Dict[str, Any]:
+  payload: Dict[str, Any] = dict(_stats)
+  payload["bytes"] = _total_bytes
+  payload["max_bytes"] = settings.riot_match_store_max_bytes
+  return payload
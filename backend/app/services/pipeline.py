@@ -0,0 +1,79 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+StepFunc = Callable[..., Awaitable[Any]]
+
+_step_stats: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+
+def _record(pipeline: str, step: str, elapsed: float) -> None:
+  entry = _step_stats.setdefault(pipeline, {}).setdefault(
+    step,
+    {"runs": 0, "total_seconds": 0.0, "max_seconds": 0.0, "last_seconds": 0.0},
+  )
+  entry["runs"] += 1
+  entry["total_seconds"] += elapsed
+  entry["max_seconds"] = max(entry["max_seconds"], elapsed)
+  entry["last_seconds"] = elapsed
+
+
+def metrics() -> Dict[str, Dict[str, Dict[str, float]]]:
+  payload: Dict[str, Dict[str, Dict[str, float]]] = {}
+  for pipeline, steps in _step_stats.items():
+    payload[pipeline] = {}
+    for step, entry in steps.items():
+      payload[pipeline][step] = {
+        "runs": entry["runs"],
+        "avg_seconds": round(entry["total_seconds"] / entry["runs"], 4),
+        "max_seconds": round(entry["max_seconds"], 4),
+        "last_seconds": round(entry["last_seconds"], 4),
+      }
+  return payload
+
+
+class Pipeline:
+  """Runs async steps as a dependency graph: a step starts as soon as its dependencies finish."""
+
+  def __init__(self, name: str, concurrency: int) -> None:
+    self.name = name
+    self.timings: Dict[str, float] = {}
+    self._steps: Dict[str, Tuple[StepFunc, Tuple[str, ...]]] = {}
+    self._semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+  def step(self, name: str, func: StepFunc, *deps: str) -> None:
+    if name in self._steps:
+      raise ValueError(f"Duplicate pipeline step {name}")
+    for dep in deps:
+      if dep not in self._steps:
+        raise ValueError(f"Unknown dependency {dep} for pipeline step {name}")
+    self._steps[name] = (func, deps)
+
+  async def _run_step(self, name: str, tasks: Dict[str, "asyncio.Task[Any]"]) -> Any:
+    func, deps = self._steps[name]
+    inputs = [await tasks[dep] for dep in deps]
+    async with self._semaphore:
+      started = time.perf_counter()
+      try:
+        return await func(*inputs)
+      finally:
+        elapsed = time.perf_counter() - started
+        self.timings[name] = elapsed
+        _record(self.name, name, elapsed)
+
+  async def run(self) -> Dict[str, Any]:
+    started = time.perf_counter()
+    tasks: Dict[str, "asyncio.Task[Any]"] = {}
+    for name in self._steps:
+      tasks[name] = asyncio.ensure_future(self._run_step(name, tasks))
+    try:
+      await asyncio.gather(*tasks.values())
+    except BaseException:
+      for task in tasks.values():
+        task.cancel()
+      await asyncio.gather(*tasks.values(), return_exceptions=True)
+      raise
+    elapsed = time.perf_counter() - started
+    self.timings["total"] = elapsed
+    _record(self.name, "total", elapsed)
+    return {name: task.result() for name, task in tasks.items()}
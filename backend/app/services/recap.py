@@ -0,0 +1,158 @@
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import orjson
+from sqlmodel import Session, select
+
+from ..models import RecapSnapshot, RiotStats, SteamStats
+from ..schemas import UserStats
+from . import steam_achievements, steam_games
+from .steam import GENRE_GAME_LIMIT, RARE_ACHIEVEMENT_THRESHOLD
+
+TOP_GAMES_LIMIT = 5
+# Rarest first, so the cap only trims the common end of the trophy scene.
+ACHIEVEMENTS_LIMIT = 100
+RARE_ACHIEVEMENTS_LIMIT = 5
+YEAR_ACHIEVEMENTS_LIMIT = 10
+
+# Named groups of UserStats fields for ?include=, roughly one per recap scene.
+SECTIONS: Dict[str, tuple] = {
+  "summary": ("year", "top_game", "total_hours", "playstyle", "longest_session"),
+  "steam_profile": ("steam_persona_name", "steam_avatar_url", "steam_profile_level", "steam_profile_created_at"),
+  "steam_games": ("steam_top_games", "steam_top_genres", "steam_games_count", "steam_recent_hours", "steam_completed_games"),
+  "steam_achievements": ("steam_achievements", "steam_rare_achievements", "steam_year_achievements"),
+  "riot": tuple(name for name in UserStats.model_fields if name.startswith("riot_")),
+  "sync": ("steam_incomplete_stages",),
+}
+
+
+class RecapView(NamedTuple):
+  etag: str
+  updated_at: datetime
+  payload: Dict[str, Any]
+
+
+def resolve_fields(fields: Optional[str], include: Optional[str]) -> Optional[List[str]]:
+  """Turns ?fields= (names or prefix*) and ?include= (section names) into UserStats fields; None means all."""
+  if not fields and not include:
+    return None
+  selected: Dict[str, None] = {}
+  for token in filter(None, (part.strip() for part in (fields or "").split(","))):
+    if token.endswith("*"):
+      matches = [name for name in UserStats.model_fields if name.startswith(token[:-1])]
+    else:
+      matches = [token] if token in UserStats.model_fields else []
+    if not matches:
+      raise ValueError(f"Unknown recap field: {token}")
+    selected.update(dict.fromkeys(matches))
+  for token in filter(None, (part.strip() for part in (include or "").split(","))):
+    if token not in SECTIONS:
+      raise ValueError(f"Unknown recap section: {token}")
+    selected.update(dict.fromkeys(SECTIONS[token]))
+  return list(selected)
+
+
+def compose(session: Session, user_id: int, steam: Optional[SteamStats], riot: Optional[RiotStats]) -> UserStats:
+  stats = UserStats()
+  if steam:
+    stats.top_game = steam.top_game
+    stats.total_hours = steam.total_hours
+    stats.longest_session = max(int(steam.longest_session or 0), 0)
+    stats.steam_persona_name = steam.persona_name
+    stats.steam_avatar_url = steam.avatar_url
+    stats.steam_profile_level = steam.profile_level
+    stats.steam_profile_created_at = steam.profile_created_at
+    stats.steam_top_games = steam_games.top_games(session, user_id, TOP_GAMES_LIMIT)
+    stats.steam_top_genres = steam_games.top_genres(session, user_id, stats.total_hours, GENRE_GAME_LIMIT)
+    stats.steam_games_count = steam.games_count
+    stats.steam_recent_hours = steam.recent_hours
+    stats.steam_achievements = steam_achievements.by_rarity(session, user_id, limit=ACHIEVEMENTS_LIMIT)
+    stats.steam_rare_achievements = steam_achievements.by_rarity(
+      session, user_id, limit=RARE_ACHIEVEMENTS_LIMIT, max_percent=RARE_ACHIEVEMENT_THRESHOLD
+    )
+    year_start = datetime(datetime.utcnow().year, 1, 1)
+    stats.steam_year_achievements = steam_achievements.unlocked_since(session, user_id, year_start, YEAR_ACHIEVEMENTS_LIMIT)
+    stats.steam_completed_games = steam.completed_games or []
+    stats.steam_incomplete_stages = steam.incomplete_stages or []
+  if riot:
+    stats.riot_rank = riot.rank
+    stats.riot_wins = riot.wins
+    stats.riot_losses = riot.losses
+    stats.riot_favorite = riot.favorite_champion
+    stats.riot_win_rate = riot.win_rate
+    stats.playstyle = riot.favorite_champion or stats.playstyle
+    stats.riot_account_name = riot.riot_account_name
+    stats.riot_profile_level = riot.riot_profile_level
+    stats.riot_profile_icon_id = riot.riot_profile_icon_id
+    stats.riot_first_match_timestamp = riot.riot_first_match_timestamp
+    stats.riot_years_active = riot.riot_years_active
+  return stats
+
+
+def _etag(payload: dict) -> str:
+  return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()[:32]
+
+
+def materialize(session: Session, user_id: int) -> Optional[RecapSnapshot]:
+  """Rebuilds the stored recap after a sync or disconnect; None (and no row) when no provider has stats."""
+  snapshot = session.exec(select(RecapSnapshot).where(RecapSnapshot.user_id == user_id)).first()
+  steam = session.exec(select(SteamStats).where(SteamStats.user_id == user_id)).first()
+  riot = session.exec(select(RiotStats).where(RiotStats.user_id == user_id)).first()
+  if not steam and not riot:
+    if snapshot:
+      session.delete(snapshot)
+      session.commit()
+    return None
+  payload = compose(session, user_id, steam, riot).model_dump(mode="json")
+  etag = _etag(payload)
+  now = datetime.utcnow()
+  if snapshot is None:
+    snapshot = RecapSnapshot(user_id=user_id, payload=payload, etag=etag, updated_at=now)
+  elif snapshot.etag == etag and snapshot.updated_at.year == now.year:
+    # Same content keeps its validators, so clients holding the old ETag still get 304s.
+    return snapshot
+  else:
+    snapshot.payload = payload
+    snapshot.etag = etag
+    snapshot.updated_at = now
+  session.add(snapshot)
+  session.commit()
+  session.refresh(snapshot)
+  return snapshot
+
+
+def _fresh(updated_at: datetime) -> bool:
+  # "This year's" sections roll over on January 1st even without a sync.
+  return updated_at.year == datetime.utcnow().year
+
+
+def _sparse(session: Session, user_id: int, fields: List[str]) -> Optional[RecapView]:
+  # Only the requested keys leave the database (json_extract / ->), not the whole payload.
+  row = session.exec(
+    select(RecapSnapshot.etag, RecapSnapshot.updated_at, *[RecapSnapshot.payload[name] for name in fields])
+    .where(RecapSnapshot.user_id == user_id)
+  ).first()
+  if row is None or not _fresh(row[1]):
+    return None
+  payload = {
+    name: value if value is not None else UserStats.model_fields[name].default
+    for name, value in zip(fields, row[2:])
+  }
+  return RecapView(row[0], row[1], payload)
+
+
+def load(session: Session, user_id: int, fields: Optional[List[str]] = None) -> Optional[RecapView]:
+  if fields:
+    view = _sparse(session, user_id, fields)
+    if view is not None:
+      return view
+    snapshot = materialize(session, user_id)
+  else:
+    snapshot = session.exec(select(RecapSnapshot).where(RecapSnapshot.user_id == user_id)).first()
+    if snapshot is None or not _fresh(snapshot.updated_at):
+      snapshot = materialize(session, user_id)
+  if snapshot is None:
+    return None
+  payload = snapshot.payload if not fields else {name: snapshot.payload.get(name) for name in fields}
+  return RecapView(snapshot.etag, snapshot.updated_at, payload)
@@ -0,0 +1,274 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, exists, or_
+from sqlmodel import select
+
+from ..config import get_settings
+from ..database import get_session
+from ..models import RiotStats, SteamStats, User
+from . import recap as recap_service
+from . import steam as steam_service
+from . import sync_jobs
+from .riot_limiter import TokenBucket
+from .upstream import registry
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+PROVIDER_MODELS = {
+  "steam": (SteamStats, User.steam_id),
+  "riot": (RiotStats, User.riot_puuid),
+}
+
+
+@dataclass(frozen=True)
+class StaleAccount:
+  provider: str
+  user_id: int
+  last_synced_at: Optional[datetime]
+
+  @property
+  def priority(self) -> Tuple[datetime, int]:
+    return (self.last_synced_at or datetime.min, self.user_id)
+
+
+def _never_synced(provider: str, page_size: int) -> Iterator[StaleAccount]:
+  model, linked_column = PROVIDER_MODELS[provider]
+  after_id = 0
+  while True:
+    with get_session() as session:
+      user_ids = session.exec(
+        select(User.id)
+        .where(linked_column.is_not(None), User.id > after_id, ~exists().where(model.user_id == User.id))
+        .order_by(User.id)
+        .limit(page_size)
+      ).all()
+    for user_id in user_ids:
+      yield StaleAccount(provider, user_id, None)
+    if len(user_ids) < page_size:
+      return
+    after_id = user_ids[-1]
+
+
+def _stale_synced(provider: str, cutoff: datetime, page_size: int) -> Iterator[StaleAccount]:
+  model, linked_column = PROVIDER_MODELS[provider]
+  cursor: Optional[Tuple[datetime, int]] = None
+  while True:
+    query = (
+      select(model.user_id, model.last_synced_at)
+      .join(User, User.id == model.user_id)
+      .where(model.last_synced_at < cutoff, linked_column.is_not(None))
+    )
+    if cursor:
+      query = query.where(
+        or_(
+          model.last_synced_at > cursor[0],
+          and_(model.last_synced_at == cursor[0], model.user_id > cursor[1]),
+        )
+      )
+    with get_session() as session:
+      rows = session.exec(query.order_by(model.last_synced_at, model.user_id).limit(page_size)).all()
+    for user_id, last_synced_at in rows:
+      yield StaleAccount(provider, user_id, last_synced_at)
+    if len(rows) < page_size:
+      return
+    cursor = (rows[-1][1], rows[-1][0])
+
+
+def iter_stale_accounts(providers: List[str], max_age: timedelta, page_size: int) -> Iterator[StaleAccount]:
+  """Yields linked accounts stalest first, never-synced ones before everything else."""
+  cutoff = datetime.utcnow() - max_age
+  streams = []
+  for provider in providers:
+    streams.append(_never_synced(provider, page_size))
+    streams.append(_stale_synced(provider, cutoff, page_size))
+  return heapq.merge(*streams, key=lambda account: account.priority)
+
+
+def _take(accounts: Iterator[StaleAccount], count: int) -> List[StaleAccount]:
+  return list(itertools.islice(accounts, count))
+
+
+async def stale_account_pages(providers: List[str], max_age: timedelta, page_size: int) -> AsyncIterator[List[StaleAccount]]:
+  """iter_stale_accounts in pages, each pulled on the threadpool since advancing it runs the paging queries."""
+  accounts = iter_stale_accounts(providers, max_age, page_size)
+  while True:
+    page = await run_in_threadpool(_take, accounts, page_size)
+    if not page:
+      return
+    yield page
+
+
+def _steam_ids(user_ids: List[int]) -> List[str]:
+  with get_session() as session:
+    return [steam_id for steam_id in session.exec(select(User.steam_id).where(User.id.in_(user_ids))).all() if steam_id]
+
+
+def _prefetch_size() -> int:
+  # Only as many accounts as the Steam rate lets sync before the primed profiles expire.
+  within_ttl = settings.refresh_steam_per_minute * settings.steam_profile_prefetch_ttl_seconds // 60
+  return max(1, min(steam_service.PLAYER_SUMMARY_BATCH_SIZE, within_ttl))
+
+
+def _chunks(page: List[StaleAccount]) -> Iterator[List[StaleAccount]]:
+  size = _prefetch_size()
+  for start in range(0, len(page), size):
+    yield page[start:start + size]
+
+
+async def _prefetch_steam_profiles(accounts: List[StaleAccount]) -> None:
+  # One GetPlayerSummaries call covers the whole chunk instead of whatever syncs happen to overlap.
+  user_ids = [account.user_id for account in accounts if account.provider == "steam"]
+  if not user_ids:
+    return
+  steam_ids = await run_in_threadpool(_steam_ids, user_ids)
+  await steam_service.prefetch_profiles(steam_ids)
+
+
+class RefreshRate:
+  def __init__(self, per_minute: int, provider_per_minute: Dict[str, int]) -> None:
+    self._global = TokenBucket(max(per_minute, 1), 60.0)
+    self._providers = {provider: TokenBucket(max(limit, 1), 60.0) for provider, limit in provider_per_minute.items()}
+
+  async def acquire(self, provider: str) -> None:
+    buckets = [self._global, self._providers[provider]]
+    while True:
+      now = time.monotonic()
+      delay = max(bucket.wait_time(now) for bucket in buckets)
+      if delay <= 0:
+        for bucket in buckets:
+          bucket.consume()
+        return
+      await asyncio.sleep(delay)
+
+
+def _default_rate() -> RefreshRate:
+  return RefreshRate(
+    settings.refresh_rate_per_minute,
+    {"steam": settings.refresh_steam_per_minute, "riot": settings.refresh_riot_per_minute},
+  )
+
+
+class RefreshScheduler:
+  """Periodically enqueues sync jobs for the stalest linked accounts."""
+
+  def __init__(self) -> None:
+    self._task: Optional["asyncio.Task[None]"] = None
+    self._stats: Dict[str, Any] = {"passes": 0, "enqueued": 0, "errors": 0}
+
+  async def start(self) -> None:
+    if settings.refresh_enabled:
+      self._task = asyncio.create_task(self._loop())
+
+  async def stop(self) -> None:
+    if self._task:
+      self._task.cancel()
+      await asyncio.gather(self._task, return_exceptions=True)
+      self._task = None
+
+  async def _loop(self) -> None:
+    rate = _default_rate()
+    while True:
+      try:
+        await self.run_pass(rate)
+      except Exception as exc:
+        # A failed pass (e.g. "database is locked") must not end the scheduler; the next one retries.
+        self._stats["errors"] += 1
+        self._stats["last_error"] = repr(exc)
+        logger.exception("refresh pass failed")
+      await asyncio.sleep(settings.refresh_interval_seconds)
+
+  async def run_pass(self, rate: RefreshRate) -> None:
+    self._stats["passes"] += 1
+    pages = stale_account_pages(
+      list(sync_jobs.PROVIDERS),
+      timedelta(hours=settings.refresh_max_age_hours),
+      settings.refresh_page_size,
+    )
+    # No profile prefetch here: the jobs may run much later or in another process, so the workers prime instead.
+    async for page in pages:
+      for account in page:
+        await rate.acquire(account.provider)
+        await run_in_threadpool(_enqueue, account)
+        self._stats["enqueued"] += 1
+
+  def metrics(self) -> Dict[str, Any]:
+    payload: Dict[str, Any] = dict(self._stats)
+    payload["enabled"] = self._task is not None
+    return payload
+
+
+def _enqueue(account: StaleAccount) -> None:
+  with get_session() as session:
+    sync_jobs.enqueue(session, account.user_id, account.provider)
+
+
+scheduler = RefreshScheduler()
+
+
+async def _refresh_account(account: StaleAccount, full: bool) -> Optional[str]:
+  try:
+    with get_session() as session:
+      user = await run_in_threadpool(session.get, User, account.user_id)
+      if not user:
+        return "user not found"
+      await sync_jobs.PROVIDERS[account.provider](session, user, full=full)
+      await run_in_threadpool(recap_service.materialize, session, user.id)
+  except Exception as exc:
+    return getattr(exc, "detail", None) or repr(exc)
+  return None
+
+
+async def run_backfill(
+  providers: List[str],
+  max_age: timedelta,
+  concurrency: int,
+  limit: Optional[int] = None,
+  full: bool = False,
+  dry_run: bool = False,
+) -> Dict[str, int]:
+  rate = _default_rate()
+  semaphore = asyncio.Semaphore(max(concurrency, 1))
+  counts = {"selected": 0, "refreshed": 0, "failed": 0}
+  pending: set = set()
+
+  async def _run(account: StaleAccount) -> None:
+    try:
+      error = await _refresh_account(account, full)
+    finally:
+      semaphore.release()
+    if error:
+      counts["failed"] += 1
+      print(f"{account.provider} user={account.user_id} failed: {error}")
+    else:
+      counts["refreshed"] += 1
+
+  async for page in stale_account_pages(providers, max_age, settings.refresh_page_size):
+    if limit is not None:
+      page = page[: max(limit - counts["selected"], 0)]
+      if not page:
+        break
+    for chunk in _chunks(page):
+      if not dry_run:
+        await _prefetch_steam_profiles(chunk)
+      for account in chunk:
+        counts["selected"] += 1
+        if dry_run:
+          print(f"{account.provider} user={account.user_id} last_synced_at={account.last_synced_at or 'never'}")
+          continue
+        await semaphore.acquire()
+        await rate.acquire(account.provider)
+        task = asyncio.create_task(_run(account))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+  await asyncio.gather(*pending)
+  await registry.aclose()
+  return counts
@@ -0,0 +1,74 @@
+import random
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from ..config import get_settings
+
+settings = get_settings()
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class UpstreamUnavailable(httpx.TransportError):
+  """Raised without touching the network while a host's circuit breaker is open."""
+
+
+def backoff_delay(attempt: int) -> float:
+  ceiling = min(settings.upstream_backoff_max_seconds, settings.upstream_backoff_base_seconds * (2 ** attempt))
+  return random.uniform(0, ceiling)
+
+
+def retry_after_delay(response: httpx.Response) -> Optional[float]:
+  value = response.headers.get("Retry-After")
+  if value is None:
+    return None
+  try:
+    return min(max(float(value), 0.0), settings.upstream_retry_after_max_seconds)
+  except ValueError:
+    return None
+
+
+class CircuitBreaker:
+  """Fails fast after repeated upstream failures, then lets a single trial request probe recovery."""
+
+  def __init__(self, origin: str) -> None:
+    self.origin = origin
+    self.state = "closed"
+    self.failures = 0
+    self.opened = 0
+    self.rejected = 0
+    self._opened_at = 0.0
+    self._trial_in_flight = False
+
+  def before_request(self) -> None:
+    if self.state == "closed":
+      return
+    if self.state == "open" and time.monotonic() - self._opened_at >= settings.upstream_breaker_cooldown_seconds:
+      self.state = "half_open"
+    if self.state == "half_open" and not self._trial_in_flight:
+      self._trial_in_flight = True
+      return
+    self.rejected += 1
+    raise UpstreamUnavailable(f"Circuit open for {self.origin}")
+
+  def record_success(self) -> None:
+    self.state = "closed"
+    self.failures = 0
+    self._trial_in_flight = False
+
+  def record_failure(self) -> None:
+    self.failures += 1
+    if self.state == "half_open" or self.failures >= settings.upstream_breaker_threshold:
+      if self.state != "open":
+        self.opened += 1
+      self.state = "open"
+      self._opened_at = time.monotonic()
+    self._trial_in_flight = False
+
+  def abandon(self) -> None:
+    self._trial_in_flight = False
+
+  def metrics(self) -> Dict[str, Any]:
+    return {"state": self.state, "failures": self.failures, "opened": self.opened, "rejected": self.rejected}
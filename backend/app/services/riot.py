@@ -1,15 +1,28 @@
-from collections import Counter
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
-import httpx
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 
 from ..config import get_settings
 from ..models import RiotStats, RiotToken, User
+from . import match_store
+from .pipeline import Pipeline
+from .riot_limiter import limiter
+from .singleflight import SingleFlight, freeze, sync_flight
 
 settings = get_settings()
+RECENT_MATCH_COUNT = 10
+MATCH_SUMMARY_LIMIT = 5
+MATCH_HISTORY_COUNT = 100
+MATCH_FETCH_CONCURRENCY = 4
+STORED_MATCH_IDS = 20
+WATERMARK_OVERLAP_SECONDS = 60 * 60
+
+_get_flight = SingleFlight("riot_get")
+_sync_flight = SingleFlight("riot_sync")
 
 
 def _require_api_key() -> str:
@@ -22,35 +35,44 @@ def _riot_headers() -> Dict[str, str]:
   return {"X-Riot-Token": _require_api_key()}
 
 
-async def _get_json(url: str, headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-  async with httpx.AsyncClient(timeout=20) as client:
-    response = await client.get(url, headers=headers, params=params)
-    if response.status_code >= 400:
-      raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Riot API error {response.status_code}")
-    return response.json()
+async def _get_json(
+  url: str,
+  method: str,
+  headers: Optional[Dict[str, str]] = None,
+  params: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+  response = await _get_flight.do(
+    (url, freeze(params)),
+    lambda: limiter.get(url, method, headers=headers, params=params),
+  )
+  if response.status_code >= 400:
+    raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Riot API error {response.status_code}")
+  return response.json()
 
 
 async def _fetch_summoner_by_puuid(puuid: str) -> Dict[str, Any]:
   url = f"https://{settings.riot_lol_region}.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{puuid}"
-  return await _get_json(url, headers=_riot_headers())
+  return await _get_json(url, "summoner-v4.by-puuid", headers=_riot_headers())
 
 
 async def _fetch_league_entries(summoner_id: str) -> List[Dict[str, Any]]:
   url = f"https://{settings.riot_lol_region}.api.riotgames.com/lol/league/v4/entries/by-summoner/{summoner_id}"
-  data = await _get_json(url, headers=_riot_headers())
+  data = await _get_json(url, "league-v4.entries-by-summoner", headers=_riot_headers())
   return data if isinstance(data, list) else []
 
 
-async def _fetch_match_ids(puuid: str, count: int = 10) -> List[str]:
-  params = {"start": 0, "count": count}
+async def _fetch_match_ids(puuid: str, count: int = 10, start: int = 0, start_time: Optional[int] = None) -> List[str]:
+  params: Dict[str, Any] = {"start": start, "count": count}
+  if start_time is not None:
+    params["startTime"] = start_time
   url = f"https://{settings.riot_match_region}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids"
-  data = await _get_json(url, headers=_riot_headers(), params=params)
+  data = await _get_json(url, "match-v5.ids-by-puuid", headers=_riot_headers(), params=params)
   return data if isinstance(data, list) else []
 
 
 async def _fetch_match(match_id: str) -> Dict[str, Any]:
   url = f"https://{settings.riot_match_region}.api.riotgames.com/lol/match/v5/matches/{match_id}"
-  return await _get_json(url, headers=_riot_headers())
+  return await match_store.read_through("lol", match_id, lambda: _get_json(url, "match-v5.match", headers=_riot_headers()))
 
 
 def _summarize_league(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -69,39 +91,70 @@ def _summarize_league(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
   }
 
 
-async def _summarize_matches(puuid: str, match_ids: List[str]) -> Dict[str, Any]:
-  if not match_ids:
-    return {"favorite_champion": None, "matches": 0, "win_rate": 0.0}
+def _window_entry(puuid: str, match_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+  participants = data.get("info", {}).get("participants", [])
+  player = next((p for p in participants if p.get("puuid") == puuid), None)
+  if not player:
+    return {"id": match_id, "win": None, "champion": None}
+  return {"id": match_id, "win": bool(player.get("win")), "champion": player.get("championName")}
+
 
-  matches_considered = 0
-  wins = 0
-  champions: Counter[str] = Counter()
-
-  for match_id in match_ids[:5]:  # limit to reduce load
-    data = await _fetch_match(match_id)
-    info = data.get("info", {})
-    participants = info.get("participants", [])
-    player = next((p for p in participants if p.get("puuid") == puuid), None)
-    if not player:
-      continue
-    matches_considered += 1
-    if player.get("win"):
-      wins += 1
-    champ = player.get("championName")
-    if champ:
-      champions[champ] += 1
-
-  if matches_considered == 0:
+async def _load_window(puuid: str, match_ids: List[str]) -> List[Dict[str, Any]]:
+  semaphore = asyncio.Semaphore(MATCH_FETCH_CONCURRENCY)
+
+  async def _load(match_id: str) -> Dict[str, Any]:
+    async with semaphore:
+      return await _fetch_match(match_id)
+
+  matches = await asyncio.gather(*[_load(match_id) for match_id in match_ids])
+  return [_window_entry(puuid, match_id, data) for match_id, data in zip(match_ids, matches)]
+
+
+def _summarize_window(window: List[Dict[str, Any]]) -> Dict[str, Any]:
+  played = [entry for entry in window if entry.get("win") is not None]
+  if not played:
     return {"favorite_champion": None, "matches": 0, "win_rate": 0.0}
 
-  favorite = champions.most_common(1)[0][0] if champions else None
+  champions: Dict[str, int] = {}
+  for entry in played:
+    if entry.get("champion"):
+      champions[entry["champion"]] = champions.get(entry["champion"], 0) + 1
+  favorite = max(champions.items(), key=lambda item: item[1])[0] if champions else None
+  wins = sum(1 for entry in played if entry["win"])
   return {
     "favorite_champion": favorite,
-    "matches": matches_considered,
-    "win_rate": round((wins / matches_considered) * 100, 2),
+    "matches": len(played),
+    "win_rate": round((wins / len(played)) * 100, 2),
+  }
+
+
+async def _summarize_matches(puuid: str, match_ids: List[str]) -> Dict[str, Any]:
+  """Stats cover a rolling window of the MATCH_SUMMARY_LIMIT most recent matches, newest first."""
+  window = await _load_window(puuid, match_ids[:MATCH_SUMMARY_LIMIT])
+  return {"summary": _summarize_window(window), "window": window}
+
+
+def _years_active(first_match_ts: Optional[int]) -> Optional[int]:
+  if not first_match_ts:
+    return None
+  created_at = datetime.utcfromtimestamp(first_match_ts)
+  return int((datetime.utcnow() - created_at).days / 365.25)
+
+
+def _account_summary(account: Dict[str, Any]) -> Dict[str, Any]:
+  game_name = account.get("gameName")
+  tag_line = account.get("tagLine")
+  return {
+    "name": f"{game_name}#{tag_line}" if game_name and tag_line else None,
+    "game_name": game_name,
+    "tag_line": tag_line,
   }
 
 
+def _epoch_seconds(value: datetime) -> int:
+  return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+
 def _upsert_stats(session: Session, user: User, summary: Dict[str, Any]) -> RiotStats:
   stats = session.exec(select(RiotStats).where(RiotStats.user_id == user.id)).first()
   if not stats:
@@ -118,6 +171,8 @@ def _upsert_stats(session: Session, user: User, summary: Dict[str, Any]) -> Riot
   stats.raw_matches = {
     "league": summary["league"],
     "matches": summary["match_ids"],
+    "window": summary.get("window"),
+    "watermark": summary.get("watermark"),
   }
   stats.last_synced_at = datetime.utcnow()
   stats.riot_account_name = summary["account"]["name"]
@@ -159,109 +214,160 @@ def _build_mock_summary(puuid: str) -> Dict[str, Any]:
   }
 
 
-async def sync_user(session: Session, user: User) -> RiotStats:
+def _can_sync_incrementally(stats: Optional[RiotStats]) -> bool:
+  if not settings.riot_incremental_sync or not stats or not stats.riot_first_match_timestamp:
+    return False
+  raw = stats.raw_matches or {}
+  return raw.get("watermark") is not None and raw.get("window") is not None
+
+
+async def sync_user(session: Session, user: User, full: bool = False) -> RiotStats:
+  return await sync_flight(_sync_flight, user.id, full, lambda: _sync_user(session, user, full))
+
+
+async def _sync_user(session: Session, user: User, full: bool) -> RiotStats:
   if not user.riot_puuid:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User missing Riot PUUID")
   if settings.riot_dev_mock_stats:
     summary = _build_mock_summary(user.riot_puuid)
-    return _upsert_stats(session, user, summary)
-  token = session.exec(select(RiotToken).where(RiotToken.user_id == user.id)).first()
+    return await run_in_threadpool(_upsert_stats, session, user, summary)
+  token, previous = await run_in_threadpool(_load_sync_state, session, user)
   if not token:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User has not authorized Riot access")
   if token.expires_at <= datetime.utcnow():
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Riot token expired, please relink account")
-  summoner = await _fetch_summoner_by_puuid(user.riot_puuid)
-  entries = await _fetch_league_entries(summoner["id"])
-  match_ids = await _fetch_match_ids(user.riot_puuid)
-  matches_summary = await _summarize_matches(user.riot_puuid, match_ids)
-  account = await _fetch_account_by_puuid(user.riot_puuid)
-
-  lol_match_ids = await _fetch_match_ids(user.riot_puuid, count=100)
-  tft_match_ids = await _fetch_tft_match_ids(user.riot_puuid, count=100)
-  lor_match_ids = await _fetch_lor_match_ids(user.riot_puuid, count=100)
-  val_match_ids = await _fetch_val_match_ids(user.riot_puuid, count=100)
-
-  lol_ts = await _oldest_match_timestamp(lol_match_ids, _fetch_match, _extract_lol_ts)
-  tft_ts = await _oldest_match_timestamp(tft_match_ids, _fetch_tft_match, _extract_tft_ts)
-  lor_ts = await _oldest_match_timestamp(lor_match_ids, _fetch_lor_match, _extract_lor_ts)
-  val_ts = await _oldest_match_timestamp(val_match_ids, _fetch_val_match, _extract_val_ts)
+  if not full and _can_sync_incrementally(previous):
+    summary = await _collect_delta(user.riot_puuid, previous)
+  else:
+    summary = await _collect_summary(user.riot_puuid)
+  return await run_in_threadpool(_upsert_stats, session, user, summary)
+
 
+def _load_sync_state(session: Session, user: User) -> Tuple[Optional[RiotToken], Optional[RiotStats]]:
+  token = session.exec(select(RiotToken).where(RiotToken.user_id == user.id)).first()
+  previous = session.exec(select(RiotStats).where(RiotStats.user_id == user.id)).first()
+  return token, previous
+
+
+async def _collect_summary(puuid: str) -> Dict[str, Any]:
+  watermark = _epoch_seconds(datetime.utcnow())
+  pipeline = Pipeline("riot_sync", settings.riot_sync_concurrency)
+  pipeline.step("summoner", lambda: _fetch_summoner_by_puuid(puuid))
+  pipeline.step("league", lambda summoner: _fetch_league_entries(summoner["id"]), "summoner")
+  pipeline.step("account", lambda: _fetch_account_by_puuid(puuid))
+  pipeline.step("lol_ids", lambda: _fetch_match_ids(puuid, count=MATCH_HISTORY_COUNT))
+  pipeline.step("tft_ids", lambda: _fetch_tft_match_ids(puuid, count=MATCH_HISTORY_COUNT))
+  pipeline.step("lor_ids", lambda: _fetch_lor_match_ids(puuid, count=MATCH_HISTORY_COUNT))
+  pipeline.step("val_ids", lambda: _fetch_val_match_ids(puuid, count=MATCH_HISTORY_COUNT))
+  pipeline.step("matches", lambda ids: _summarize_matches(puuid, ids[:RECENT_MATCH_COUNT]), "lol_ids")
+  pipeline.step("lol_ts", lambda ids: _oldest_match_timestamp(ids, _fetch_match, _extract_lol_ts), "lol_ids")
+  pipeline.step("tft_ts", lambda ids: _oldest_match_timestamp(ids, _fetch_tft_match, _extract_tft_ts), "tft_ids")
+  pipeline.step("lor_ts", lambda ids: _oldest_match_timestamp(ids, _fetch_lor_match, _extract_lor_ts), "lor_ids")
+  pipeline.step("val_ts", lambda ids: _oldest_match_timestamp(ids, _fetch_val_match, _extract_val_ts), "val_ids")
+  results = await pipeline.run()
+
+  summoner = results["summoner"]
   timestamps = []
-  for ts in (lol_ts, tft_ts, lor_ts, val_ts):
+  for ts in (results["lol_ts"], results["tft_ts"], results["lor_ts"], results["val_ts"]):
     nts = _normalize_timestamp(ts)
     if nts:
       timestamps.append(nts)
-
   first_match_ts = min(timestamps) if timestamps else None
-  years_active = None
-  if first_match_ts:
-    created_at = datetime.utcfromtimestamp(first_match_ts)
-    years_active = int((datetime.utcnow() - created_at).days / 365.25)
 
-  riot_name = None
-  game_name = account.get("gameName")
-  tag_line = account.get("tagLine")
-  if game_name and tag_line:
-    riot_name = f"{game_name}#{tag_line}"
+  return {
+    "league": _summarize_league(results["league"]),
+    "matches": results["matches"]["summary"],
+    "window": results["matches"]["window"],
+    "match_ids": results["lol_ids"][:STORED_MATCH_IDS],
+    "watermark": watermark,
+    "account": _account_summary(results["account"]),
+    "profile": {
+      "level": summoner.get("summonerLevel"),
+      "icon_id": summoner.get("profileIconId"),
+    },
+    "first_match_timestamp": first_match_ts,
+    "years_active": _years_active(first_match_ts),
+  }
 
 
-  summary = {
-    "league": _summarize_league(entries),
-    "matches": matches_summary,
-    "match_ids": match_ids[:20],
-    "account": {
-      "name": riot_name,
-      "game_name": game_name,
-      "tag_line": tag_line,
-    },
+async def _collect_delta(puuid: str, previous: RiotStats) -> Dict[str, Any]:
+  watermark = _epoch_seconds(datetime.utcnow())
+  raw = previous.raw_matches or {}
+  known_ids = list(raw.get("matches") or [])
+  since = int(raw["watermark"]) - WATERMARK_OVERLAP_SECONDS
+
+  async def _merge_new_matches(match_ids: List[str]) -> Dict[str, Any]:
+    # Ids come newest first; only the newest few can enter the window, older new ones would be trimmed anyway.
+    seen = set(known_ids)
+    new_ids = [match_id for match_id in match_ids if match_id not in seen][:MATCH_SUMMARY_LIMIT]
+    window = (await _load_window(puuid, new_ids) + list(raw["window"]))[:MATCH_SUMMARY_LIMIT]
+    return {"summary": _summarize_window(window), "window": window}
+
+  pipeline = Pipeline("riot_delta_sync", settings.riot_sync_concurrency)
+  pipeline.step("summoner", lambda: _fetch_summoner_by_puuid(puuid))
+  pipeline.step("league", lambda summoner: _fetch_league_entries(summoner["id"]), "summoner")
+  pipeline.step("account", lambda: _fetch_account_by_puuid(puuid))
+  # One page covers everything kept: the stored id list and the summary window are both the newest ids.
+  pipeline.step("lol_ids", lambda: _fetch_match_ids(puuid, count=STORED_MATCH_IDS, start_time=since))
+  pipeline.step("matches", _merge_new_matches, "lol_ids")
+  results = await pipeline.run()
+
+  summoner = results["summoner"]
+  first_match_ts = previous.riot_first_match_timestamp
+  return {
+    "league": _summarize_league(results["league"]),
+    "matches": results["matches"]["summary"],
+    "window": results["matches"]["window"],
+    "match_ids": list(dict.fromkeys(results["lol_ids"] + known_ids))[:STORED_MATCH_IDS],
+    "watermark": watermark,
+    "account": _account_summary(results["account"]),
     "profile": {
       "level": summoner.get("summonerLevel"),
       "icon_id": summoner.get("profileIconId"),
     },
     "first_match_timestamp": first_match_ts,
-    "years_active": years_active,
+    "years_active": _years_active(first_match_ts),
   }
-  return _upsert_stats(session, user, summary)
 
 
 async def _fetch_account_by_puuid(puuid: str) -> Dict[str, Any]:
   url = f"https://{settings.riot_match_region}.api.riotgames.com/riot/account/v1/accounts/by-puuid/{puuid}"
-  return await _get_json(url, headers=_riot_headers())
+  return await _get_json(url, "account-v1.by-puuid", headers=_riot_headers())
 
 async def _fetch_tft_match_ids(puuid: str, count: int = 10) -> List[str]:
    params = {"start": 0, "count": count}
    url = f"https://{settings.riot_match_region}.api.riotgames.com/tft/match/v1/matches/by-puuid/{puuid}/ids"
-   data = await _get_json(url, headers=_riot_headers(), params=params)
+   data = await _get_json(url, "tft-match-v1.ids-by-puuid", headers=_riot_headers(), params=params)
    return data if isinstance(data, list) else []
 
 async def _fetch_lor_match_ids(puuid: str, count: int = 10) -> List[str]:
   params = {"start": 0, "count": count}
   url = f"https://{settings.riot_match_region}.api.riotgames.com/lor/match/v1/matches/by-puuid/{puuid}/ids"
-  data = await _get_json(url, headers=_riot_headers(), params=params)
+  data = await _get_json(url, "lor-match-v1.ids-by-puuid", headers=_riot_headers(), params=params)
   return data if isinstance(data, list) else []
 
 
 async def _fetch_val_match_ids(puuid: str, count: int = 10) -> List[str]:
   params = {"start": 0, "count": count}
   url = f"https://{settings.riot_region}.api.riotgames.com/val/match/v1/matchlists/by-puuid/{puuid}"
-  data = await _get_json(url, headers=_riot_headers(), params=params)
+  data = await _get_json(url, "val-match-v1.matchlist", headers=_riot_headers(), params=params)
   history = data.get("history", []) if isinstance(data, dict) else []
   return [item.get("matchId") for item in history if item.get("matchId")][:count]
 
 
 async def _fetch_tft_match(match_id: str) -> Dict[str, Any]:
   url = f"https://{settings.riot_match_region}.api.riotgames.com/tft/match/v1/matches/{match_id}"
-  return await _get_json(url, headers=_riot_headers())
+  return await match_store.read_through("tft", match_id, lambda: _get_json(url, "tft-match-v1.match", headers=_riot_headers()))
 
 
 async def _fetch_lor_match(match_id: str) -> Dict[str, Any]:
   url = f"https://{settings.riot_match_region}.api.riotgames.com/lor/match/v1/matches/{match_id}"
-  return await _get_json(url, headers=_riot_headers())
+  return await match_store.read_through("lor", match_id, lambda: _get_json(url, "lor-match-v1.match", headers=_riot_headers()))
 
 
 async def _fetch_val_match(match_id: str) -> Dict[str, Any]:
   url = f"https://{settings.riot_region}.api.riotgames.com/val/match/v1/matches/{match_id}"
-  return await _get_json(url, headers=_riot_headers())
+  return await match_store.read_through("val", match_id, lambda: _get_json(url, "val-match-v1.match", headers=_riot_headers()))
 
 
 def _normalize_timestamp(ts: Optional[int]) -> Optional[int]:
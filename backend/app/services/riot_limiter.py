@@ -0,0 +1,168 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..config import get_settings
+from .upstream import registry
+
+settings = get_settings()
+DEFAULT_RETRY_AFTER = 1.0
+
+
+def _parse_limits(header: Optional[str]) -> List[Tuple[int, float]]:
+  limits: List[Tuple[int, float]] = []
+  for chunk in (header or "").split(","):
+    count, _, seconds = chunk.strip().partition(":")
+    try:
+      limits.append((int(count), float(seconds)))
+    except ValueError:
+      continue
+  return [(count, seconds) for count, seconds in limits if count > 0 and seconds > 0]
+
+
+def _parse_counts(header: Optional[str]) -> Dict[float, int]:
+  return {seconds: count for count, seconds in _parse_limits(header)}
+
+
+def _retry_after(response: httpx.Response) -> float:
+  try:
+    return max(float(response.headers.get("Retry-After", DEFAULT_RETRY_AFTER)), 0.0)
+  except ValueError:
+    return DEFAULT_RETRY_AFTER
+
+
+class TokenBucket:
+  def __init__(self, capacity: int, period: float) -> None:
+    self.capacity = capacity
+    self.period = period
+    self.tokens = float(capacity)
+    self.updated_at = time.monotonic()
+
+  def _refill(self, now: float) -> None:
+    rate = self.capacity / self.period
+    self.tokens = min(float(self.capacity), self.tokens + (now - self.updated_at) * rate)
+    self.updated_at = now
+
+  def wait_time(self, now: float) -> float:
+    self._refill(now)
+    if self.tokens >= 1:
+      return 0.0
+    return (1 - self.tokens) * self.period / self.capacity
+
+  def consume(self) -> None:
+    self.tokens -= 1
+
+  def sync_count(self, used: int) -> None:
+    self.tokens = min(self.tokens, float(self.capacity - used))
+
+
+class RateLimit:
+  """Set of token buckets sharing a FIFO queue, one bucket per Riot limit window."""
+
+  def __init__(self, limits: List[Tuple[int, float]]) -> None:
+    self.lock = asyncio.Lock()
+    self.spec: List[Tuple[int, float]] = []
+    self.buckets: List[TokenBucket] = []
+    self.blocked_until = 0.0
+    self.configure(limits)
+
+  def configure(self, limits: List[Tuple[int, float]]) -> None:
+    if limits == self.spec:
+      return
+    self.spec = list(limits)
+    self.buckets = [TokenBucket(count, seconds) for count, seconds in limits]
+
+  def sync_counts(self, counts: Dict[float, int]) -> None:
+    for bucket in self.buckets:
+      used = counts.get(bucket.period)
+      if used is not None:
+        bucket.sync_count(used)
+
+  def block_for(self, seconds: float) -> None:
+    self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+  async def acquire(self) -> float:
+    waited = 0.0
+    async with self.lock:
+      while True:
+        now = time.monotonic()
+        delay = max([self.blocked_until - now] + [bucket.wait_time(now) for bucket in self.buckets])
+        if delay <= 0:
+          for bucket in self.buckets:
+            bucket.consume()
+          return waited
+        waited += delay
+        await asyncio.sleep(delay)
+
+
+class RiotRateLimiter:
+  """Queues Riot API calls behind app-level (per routing host) and method-level limits."""
+
+  def __init__(self) -> None:
+    self._app_limits: Dict[str, RateLimit] = {}
+    self._method_limits: Dict[Tuple[str, str], RateLimit] = {}
+    self._stats = {"requests": 0, "delayed": 0, "wait_seconds": 0.0, "throttled": 0}
+
+  def _app_limit(self, host: str) -> RateLimit:
+    limit = self._app_limits.get(host)
+    if limit is None:
+      limit = RateLimit(_parse_limits(settings.riot_app_rate_limit))
+      self._app_limits[host] = limit
+    return limit
+
+  def _method_limit(self, host: str, method: str) -> RateLimit:
+    limit = self._method_limits.get((host, method))
+    if limit is None:
+      limit = RateLimit([])
+      self._method_limits[(host, method)] = limit
+    return limit
+
+  def _learn(self, app_limit: RateLimit, method_limit: RateLimit, response: httpx.Response) -> None:
+    headers = response.headers
+    if "X-App-Rate-Limit" in headers:
+      app_limit.configure(_parse_limits(headers["X-App-Rate-Limit"]))
+      app_limit.sync_counts(_parse_counts(headers.get("X-App-Rate-Limit-Count")))
+    if "X-Method-Rate-Limit" in headers:
+      method_limit.configure(_parse_limits(headers["X-Method-Rate-Limit"]))
+      method_limit.sync_counts(_parse_counts(headers.get("X-Method-Rate-Limit-Count")))
+    if response.status_code == 429:
+      self._stats["throttled"] += 1
+      retry_after = _retry_after(response)
+      limit_type = (headers.get("X-Rate-Limit-Type") or "").lower()
+      if limit_type == "application":
+        app_limit.block_for(retry_after)
+      else:
+        method_limit.block_for(retry_after)
+
+  async def get(self, url: str, method: str, **kwargs: Any) -> httpx.Response:
+    host = urlsplit(url).netloc
+    app_limit = self._app_limit(host)
+    method_limit = self._method_limit(host, method)
+    attempts = 0
+    while True:
+      waited = await method_limit.acquire()
+      waited += await app_limit.acquire()
+      self._stats["requests"] += 1
+      if waited > 0:
+        self._stats["delayed"] += 1
+        self._stats["wait_seconds"] += waited
+      response = await registry.get(url, retry_on_429=False, **kwargs)
+      self._learn(app_limit, method_limit, response)
+      if response.status_code != 429 or attempts >= settings.riot_rate_limit_max_retries:
+        return response
+      attempts += 1
+
+  def metrics(self) -> Dict[str, Any]:
+    payload: Dict[str, Any] = dict(self._stats)
+    payload["wait_seconds"] = round(payload["wait_seconds"], 3)
+    payload["app_limits"] = {host: limit.spec for host, limit in self._app_limits.items()}
+    payload["method_limits"] = {
+      f"{host} {method}": limit.spec for (host, method), limit in self._method_limits.items() if limit.spec
+    }
+    return payload
+
+
+limiter = RiotRateLimiter()
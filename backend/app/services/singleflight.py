@@ -0,0 +1,69 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+_groups: Dict[str, "SingleFlight"] = {}
+
+
+def freeze(value: Any) -> Hashable:
+  if isinstance(value, dict):
+    return tuple(sorted((str(key), freeze(item)) for key, item in value.items()))
+  if isinstance(value, (list, tuple)):
+    return tuple(freeze(item) for item in value)
+  if value is None or isinstance(value, (str, int, float, bool)):
+    return value
+  return str(value)
+
+
+class SingleFlight:
+  """Shares one in-flight call between concurrent callers asking for the same key."""
+
+  def __init__(self, name: str) -> None:
+    self.name = name
+    self.calls = 0
+    self.coalesced = 0
+    self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+    _groups[name] = self
+
+  async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+    self.calls += 1
+    future = self._inflight.get(key)
+    if future is not None:
+      self.coalesced += 1
+      return await asyncio.shield(future)
+    future = asyncio.ensure_future(func())
+    self._inflight[key] = future
+    future.add_done_callback(lambda done: self._forget(key, done))
+    return await asyncio.shield(future)
+
+  async def wait(self, key: Hashable) -> None:
+    future = self._inflight.get(key)
+    if future is not None:
+      await asyncio.wait([future])
+
+  def in_flight(self, key: Hashable) -> bool:
+    return key in self._inflight
+
+  def _forget(self, key: Hashable, future: "asyncio.Future[Any]") -> None:
+    if self._inflight.get(key) is future:
+      del self._inflight[key]
+    if not future.cancelled():
+      future.exception()
+
+
+async def sync_flight(flight: SingleFlight, user_id: int, full: bool, run: Callable[[], Awaitable[T]]) -> T:
+  """Coalesces provider syncs per (user, full); a full sync never settles for an incremental result."""
+  full_key = (user_id, True)
+  if not full and flight.in_flight(full_key):
+    return await flight.do(full_key, run)
+  if full:
+    await flight.wait((user_id, False))
+  return await flight.do((user_id, full), run)
+
+
+def metrics() -> Dict[str, Dict[str, int]]:
+  return {
+    name: {"calls": group.calls, "coalesced": group.coalesced, "in_flight": len(group._inflight)}
+    for name, group in _groups.items()
+  }
@@ -1,28 +1,32 @@
 import asyncio
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Dict, List, Optional, TypeVar
 
 import httpx
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 
 from ..config import get_settings
 from ..models import SteamStats, User
+from . import achievement_cache, deadline, steam_achievements, steam_catalog, steam_games
+from .batching import MicroBatcher
+from .singleflight import SingleFlight, sync_flight
+from .steam_library import JsonArrayStream, OwnedGame, SteamLibrary
+from .upstream import registry
 
 settings = get_settings()
+T = TypeVar("T")
 STEAM_API_BASE = "https://api.steampowered.com"
 RARE_ACHIEVEMENT_THRESHOLD = 10.0
 ACHIEVEMENT_GAME_LIMIT = 20
 STORE_API_BASE = "https://store.steampowered.com/api"
-GENRE_GAME_LIMIT = 12
-GENRE_FETCH_CONCURRENCY = 4
+GENRE_GAME_LIMIT = 25
+PLAYER_SUMMARY_BATCH_SIZE = 100
+LIBRARY_TOP_N = max(GENRE_GAME_LIMIT, ACHIEVEMENT_GAME_LIMIT)
 
-
-def _percent_sort_key(item: Dict[str, Any]) -> tuple:
-  percent = item.get("percent")
-  if percent is None:
-    return (1, 0.0)
-  return (0, percent)
+_sync_stats = {"achievement_games_fetched": 0, "achievement_games_reused": 0}
+_sync_flight = SingleFlight("steam_sync")
 
 
 def _require_steam_key() -> str:
@@ -31,7 +35,7 @@ def _require_steam_key() -> str:
   return settings.steam_api_key
 
 
-async def _fetch_owned_games(steam_id: str) -> Dict[str, Any]:
+async def _fetch_owned_games(steam_id: str) -> SteamLibrary:
   key = _require_steam_key()
   params = {
     "key": key,
@@ -40,32 +44,66 @@ async def _fetch_owned_games(steam_id: str) -> Dict[str, Any]:
     "include_played_free_games": 1,
     "format": "json",
   }
-  async with httpx.AsyncClient(timeout=20) as client:
-    response = await client.get(f"{STEAM_API_BASE}/IPlayerService/GetOwnedGames/v0001/", params=params)
+  library = SteamLibrary(LIBRARY_TOP_N)
+  parser = JsonArrayStream(("response", "games"))
+  async with registry.stream("GET", f"{STEAM_API_BASE}/IPlayerService/GetOwnedGames/v0001/", params=params) as response:
     if response.status_code >= 400:
       raise HTTPException(
         status_code=status.HTTP_502_BAD_GATEWAY,
         detail=f"Steam API error ({response.status_code})",
       )
-    return response.json().get("response", {})
+    async for chunk in response.aiter_bytes():
+      for item in parser.feed(chunk):
+        game = OwnedGame.from_json(item)
+        if game is not None:
+          library.add(game)
+  return library
 
 
-async def _fetch_player_summary(steam_id: str) -> Dict[str, Any]:
+async def _fetch_player_summaries(steam_ids: List[str]) -> Dict[str, Dict[str, Any]]:
   key = _require_steam_key()
   params = {
     "key": key,
-    "steamids": steam_id,
+    "steamids": ",".join(steam_ids),
     "format": "json",
   }
-  async with httpx.AsyncClient(timeout=20) as client:
-    response = await client.get(f"{STEAM_API_BASE}/ISteamUser/GetPlayerSummaries/v0002/", params=params)
-    if response.status_code >= 400:
-      raise HTTPException(
-        status_code=status.HTTP_502_BAD_GATEWAY,
-        detail=f"Steam API error ({response.status_code})",
-      )
-    players = response.json().get("response", {}).get("players", [])
-    return players[0] if players else {}
+  response = await registry.get(f"{STEAM_API_BASE}/ISteamUser/GetPlayerSummaries/v0002/", params=params)
+  if response.status_code >= 400:
+    raise HTTPException(
+      status_code=status.HTTP_502_BAD_GATEWAY,
+      detail=f"Steam API error ({response.status_code})",
+    )
+  players = response.json().get("response", {}).get("players", [])
+  return {player["steamid"]: player for player in players if player.get("steamid")}
+
+
+_profile_batcher: MicroBatcher[str, Dict[str, Any]] = MicroBatcher(
+  "steam_player_summaries",
+  _fetch_player_summaries,
+  max_size=PLAYER_SUMMARY_BATCH_SIZE,
+  window=settings.steam_profile_batch_window_ms / 1000,
+)
+
+
+async def prefetch_profiles(steam_ids: List[str]) -> None:
+  """Primes the profile batcher with one GetPlayerSummaries call per PLAYER_SUMMARY_BATCH_SIZE ids."""
+  unique_ids = [steam_id for steam_id in dict.fromkeys(steam_ids) if not _profile_batcher.is_primed(steam_id)]
+  for start in range(0, len(unique_ids), PLAYER_SUMMARY_BATCH_SIZE):
+    chunk = unique_ids[start:start + PLAYER_SUMMARY_BATCH_SIZE]
+    try:
+      summaries = await _fetch_player_summaries(chunk)
+    except (HTTPException, httpx.HTTPError):
+      # The syncs still batch among themselves; prefetching is only an optimization.
+      continue
+    _profile_batcher.prime({steam_id: summaries.get(steam_id) for steam_id in chunk}, settings.steam_profile_prefetch_ttl_seconds)
+
+
+def profile_primed(steam_id: str) -> bool:
+  return _profile_batcher.is_primed(steam_id)
+
+
+async def _fetch_player_summary(steam_id: str) -> Dict[str, Any]:
+  return await _profile_batcher.load(steam_id) or {}
 
 
 async def _fetch_player_level(steam_id: str) -> Optional[int]:
@@ -75,14 +113,13 @@ async def _fetch_player_level(steam_id: str) -> Optional[int]:
     "steamid": steam_id,
     "format": "json",
   }
-  async with httpx.AsyncClient(timeout=20) as client:
-    response = await client.get(f"{STEAM_API_BASE}/IPlayerService/GetSteamLevel/v1/", params=params)
-    if response.status_code >= 400:
-      raise HTTPException(
-        status_code=status.HTTP_502_BAD_GATEWAY,
-        detail=f"Steam API error ({response.status_code})",
-      )
-    return response.json().get("response", {}).get("player_level")
+  response = await registry.get(f"{STEAM_API_BASE}/IPlayerService/GetSteamLevel/v1/", params=params)
+  if response.status_code >= 400:
+    raise HTTPException(
+      status_code=status.HTTP_502_BAD_GATEWAY,
+      detail=f"Steam API error ({response.status_code})",
+    )
+  return response.json().get("response", {}).get("player_level")
 
 
 async def _fetch_player_achievements(steam_id: str, appid: int) -> Optional[List[Dict[str, Any]]]:
@@ -94,14 +131,21 @@ async def _fetch_player_achievements(steam_id: str, appid: int) -> Optional[List
     "l": "english",
     "format": "json",
   }
-  async with httpx.AsyncClient(timeout=20) as client:
-    response = await client.get(f"{STEAM_API_BASE}/ISteamUserStats/GetPlayerAchievements/v0001/", params=params)
-    if response.status_code >= 400:
-      return None
-    payload = response.json().get("playerstats", {})
-    if payload.get("error") or payload.get("success") == 0:
-      return None
-    return payload.get("achievements") or []
+  try:
+    response = await registry.get(
+      f"{STEAM_API_BASE}/ISteamUserStats/GetPlayerAchievements/v0001/",
+      params=params,
+      hedge=True,
+    )
+  except httpx.HTTPError:
+    # Includes UpstreamUnavailable while the breaker is open: the caller falls back to the previous snapshot.
+    return None
+  if response.status_code >= 400:
+    return None
+  payload = response.json().get("playerstats", {})
+  if payload.get("error") or payload.get("success") == 0:
+    return None
+  return payload.get("achievements") or []
 
 
 async def _fetch_global_achievement_percentages(appid: int) -> Optional[Dict[str, float]]:
@@ -109,162 +153,187 @@ async def _fetch_global_achievement_percentages(appid: int) -> Optional[Dict[str
     "gameid": appid,
     "format": "json",
   }
-  async with httpx.AsyncClient(timeout=20) as client:
-    response = await client.get(f"{STEAM_API_BASE}/ISteamUserStats/GetGlobalAchievementPercentagesForApp/v0002/", params=params)
-    if response.status_code >= 400:
-      return None
-    achievements = response.json().get("achievementpercentages", {}).get("achievements", [])
-    return {item.get("name"): item.get("percent", 0.0) for item in achievements if item.get("name")}
-
-
-async def _fetch_store_genres(appid: int) -> List[str]:
+  try:
+    response = await registry.get(
+      f"{STEAM_API_BASE}/ISteamUserStats/GetGlobalAchievementPercentagesForApp/v0002/",
+      params=params,
+      hedge=True,
+    )
+  except httpx.HTTPError:
+    return None
+  if response.status_code >= 400:
+    return None
+  achievements = response.json().get("achievementpercentages", {}).get("achievements", [])
+  return {item.get("name"): item.get("percent", 0.0) for item in achievements if item.get("name")}
+
+
+async def _fetch_store_details(appid: int) -> Optional[Dict[str, Any]]:
   params = {
     "appids": appid,
     "filters": "genres",
   }
-  async with httpx.AsyncClient(timeout=10) as client:
-    try:
-      response = await client.get(f"{STORE_API_BASE}/appdetails", params=params)
-    except httpx.HTTPError:
-      return []
-    if response.status_code >= 400:
-      return []
-    try:
-      payload = response.json()
-    except ValueError:
-      return []
-  app_data = payload.get(str(appid), {})
+  try:
+    response = await registry.get(f"{STORE_API_BASE}/appdetails", params=params, timeout=settings.steam_store_timeout)
+  except httpx.HTTPError:
+    return None
+  if response.status_code >= 400:
+    return None
+  try:
+    payload = response.json()
+  except ValueError:
+    return None
+  if not isinstance(payload, dict):
+    return None
+  app_data = payload.get(str(appid)) or {}
   if not app_data.get("success"):
-    return []
+    return {"listed": False, "genres": []}
   data = app_data.get("data") or {}
   genres = data.get("genres") or []
-  return [genre.get("description") for genre in genres if genre.get("description")]
+  return {
+    "listed": True,
+    "genres": [genre.get("description") for genre in genres if genre.get("description")],
+  }
 
 
-async def _attach_genres_to_games(games: List[Dict[str, Any]]) -> None:
+async def _refresh_genres(games: List[OwnedGame]) -> None:
+  # Recap reads genres from the catalog, so the sync only has to make sure the top games are in it.
   if not games:
     return
-  ranked_games = sorted(games, key=lambda g: g.get("playtime_forever", 0), reverse=True)
-  candidates = ranked_games[:GENRE_GAME_LIMIT]
-  semaphore = asyncio.Semaphore(GENRE_FETCH_CONCURRENCY)
+  await steam_catalog.genres_for({game.appid: game.name for game in games[:GENRE_GAME_LIMIT]}, _fetch_store_details)
+
+
+def _build_game_achievements(
+  game: OwnedGame,
+  player_achievements: List[Dict[str, Any]],
+  global_percentages: Dict[str, float],
+) -> Dict[str, Any]:
+  achievements: List[Dict[str, Any]] = []
+  achieved = [ach for ach in player_achievements if ach.get("achieved") == 1]
+  for ach in achieved:
+    name = ach.get("name")
+    percent = global_percentages.get(name)
+    if not name:
+      continue
+    percent_value = None
+    if percent is not None:
+      try:
+        percent_value = round(float(percent), 2)
+      except (TypeError, ValueError):
+        percent_value = None
+    achievements.append({
+      "game": game.name or "Unknown",
+      "appid": game.appid,
+      "name": name,
+      "percent": percent_value,
+      "unlocked_at": ach.get("unlocktime") or None,
+    })
+
+  completed = None
+  if player_achievements and len(achieved) == len(player_achievements):
+    completed = {
+      "name": game.name or "Unknown",
+      "appid": game.appid,
+      "hours": round(game.playtime_forever / 60, 1),
+    }
+  return {"achievements": achievements, "completed": completed}
 
-  async def _process_game(game: Dict[str, Any]) -> None:
-    appid = game.get("appid")
-    if not appid:
-      return
-    try:
-      app_id = int(appid)
-    except (TypeError, ValueError):
-      return
-    async with semaphore:
-      genres = await _fetch_store_genres(app_id)
-    if genres:
-      game["genres"] = genres
 
-  await asyncio.gather(*[_process_game(game) for game in candidates])
+def _fingerprint(playtime: Optional[int], completed: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+  return {"playtime_forever": playtime, "completed": completed}
 
 
-async def _summarize_achievements(steam_id: str, games: List[Dict[str, Any]]) -> Dict[str, Any]:
+def _reuse_snapshot(game: OwnedGame, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+  # The unlocked achievements of a reused game are already rows in steam_user_achievement.
+  completed = snapshot.get("completed")
+  if completed:
+    completed = {**completed, "name": game.name or "Unknown"}
+  return {"achievements": [], "completed": completed}
+
+
+async def _summarize_achievements(
+  steam_id: str,
+  games: List[OwnedGame],
+  snapshots: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
   if not games:
-    return {"achievements": [], "rare_achievements": [], "completed_games": []}
+    return {"achievements": [], "completed_games": [], "game_snapshots": {}}
 
-  ranked_games = sorted(games, key=lambda g: g.get("playtime_forever", 0), reverse=True)
-  candidates = ranked_games[:ACHIEVEMENT_GAME_LIMIT]
+  snapshots = snapshots or {}
+  candidates = games[:ACHIEVEMENT_GAME_LIMIT]
   semaphore = asyncio.Semaphore(4)
+  game_snapshots: Dict[str, Any] = {}
 
-  async def _process_game(game: Dict[str, Any]) -> Dict[str, Any]:
-    appid = game.get("appid")
+  async def _process_game(game: OwnedGame) -> Dict[str, Any]:
+    appid = game.appid
     if not appid:
-      return {"achievements": [], "rare": [], "completed": None}
+      return {"achievements": [], "completed": None}
+    previous = snapshots.get(str(appid))
+    playtime = game.playtime_forever
+    if previous and previous.get("playtime_forever") == playtime:
+      _sync_stats["achievement_games_reused"] += 1
+      game_snapshots[str(appid)] = _fingerprint(playtime, previous.get("completed"))
+      return _reuse_snapshot(game, previous)
+
+    _sync_stats["achievement_games_fetched"] += 1
     async with semaphore:
       player_achievements = await _fetch_player_achievements(steam_id, appid)
-      global_percentages = await _fetch_global_achievement_percentages(appid)
+      global_percentages = await achievement_cache.get_percentages(appid, _fetch_global_achievement_percentages)
+    if player_achievements is None and previous:
+      game_snapshots[str(appid)] = _fingerprint(previous.get("playtime_forever"), previous.get("completed"))
+      return _reuse_snapshot(game, previous)
     if not player_achievements:
-      return {"achievements": [], "rare": [], "completed": None}
-
-    global_percentages = global_percentages or {}
-    achievements: List[Dict[str, Any]] = []
-    rare: List[Dict[str, Any]] = []
-    achieved = [ach for ach in player_achievements if ach.get("achieved") == 1]
-    for ach in achieved:
-      name = ach.get("name")
-      percent = global_percentages.get(name)
-      if not name:
-        continue
-      percent_value = None
-      if percent is not None:
-        try:
-          percent_value = round(float(percent), 2)
-        except (TypeError, ValueError):
-          percent_value = None
-      entry = {
-        "game": game.get("name") or "Unknown",
-        "name": name,
-        "percent": percent_value,
-      }
-      achievements.append(entry)
-      if percent_value is not None and percent_value <= RARE_ACHIEVEMENT_THRESHOLD:
-        rare.append(entry)
-
-    completed = None
-    if player_achievements and len(achieved) == len(player_achievements):
-      completed = {
-        "name": game.get("name") or "Unknown",
-        "appid": int(appid),
-        "hours": round((game.get("playtime_forever", 0) or 0) / 60, 1),
-      }
-
-    return {"achievements": achievements, "rare": rare, "completed": completed}
-
-  results = await asyncio.gather(*[_process_game(game) for game in candidates])
+      # Games without achievements get a fingerprint too, so an unchanged playtime skips them next time.
+      game_snapshots[str(appid)] = _fingerprint(playtime, None)
+      return {"achievements": [], "completed": None}
+
+    result = _build_game_achievements(game, player_achievements, global_percentages or {})
+    game_snapshots[str(appid)] = _fingerprint(playtime, result["completed"])
+    return result
+
+  tasks = {asyncio.ensure_future(_process_game(game)): game for game in candidates}
+  budget = deadline.remaining()
+  done, pending = await asyncio.wait(tasks, timeout=budget) if tasks else (set(), set())
+  for task in pending:
+    task.cancel()
+  results: List[Dict[str, Any]] = []
+  for task, game in tasks.items():
+    if task in done:
+      results.append(task.result())
+      continue
+    previous = snapshots.get(str(game.appid))
+    if previous:
+      game_snapshots[str(game.appid)] = _fingerprint(previous.get("playtime_forever"), previous.get("completed"))
+      results.append(_reuse_snapshot(game, previous))
+  if pending:
+    deadline.mark_incomplete("achievements")
   achievements: List[Dict[str, Any]] = []
-  rare_achievements: List[Dict[str, Any]] = []
   completed_games: List[Dict[str, Any]] = []
 
   for result in results:
     achievements.extend(result["achievements"])
-    rare_achievements.extend(result["rare"])
     if result["completed"]:
       completed_games.append(result["completed"])
 
-  achievements = sorted(achievements, key=_percent_sort_key)
-  rare_achievements = sorted(rare_achievements, key=_percent_sort_key)[:5]
+  # Ranking (rarest, this year's) happens in SQL over steam_user_achievement at recap time.
   completed_games = completed_games[:5]
 
   return {
     "achievements": achievements,
-    "rare_achievements": rare_achievements,
     "completed_games": completed_games,
+    "game_snapshots": game_snapshots,
   }
 
 
-def _summarize_games(games: List[Dict[str, Any]]) -> Dict[str, Any]:
-  if not games:
-    return {
-      "total_hours": 0.0,
-      "games_count": 0,
-      "recent_hours": 0.0,
-      "longest_session": 0,
-      "top_game": None,
-      "last_played_game": None,
-      "raw_games": [],
-    }
-
-  total_minutes = sum(game.get("playtime_forever", 0) for game in games)
-  recent_minutes = sum(game.get("playtime_2weeks", 0) for game in games if "playtime_2weeks" in game)
-  longest_session_minutes = max((game.get("playtime_forever", 0) for game in games), default=0)
-  top_game_entry = max(games, key=lambda g: g.get("playtime_forever", 0), default=None)
-  recent_entry = max(games, key=lambda g: g.get("playtime_2weeks", 0), default=None)
-  raw_games = sorted(games, key=lambda g: g.get("playtime_forever", 0), reverse=True)[:25]
-
+def _summarize_games(library: SteamLibrary, games: List[OwnedGame]) -> Dict[str, Any]:
+  top_game = games[0] if games else None
+  recent = library.most_recent
   return {
-    "total_hours": round(total_minutes / 60, 2),
-    "games_count": len(games),
-    "recent_hours": round(recent_minutes / 60, 2),
-    "longest_session": int(round(longest_session_minutes / 60)),
-    "top_game": top_game_entry.get("name") if top_game_entry else None,
-    "last_played_game": recent_entry.get("name") if recent_entry and recent_entry.get("playtime_2weeks") else None,
-    "raw_games": raw_games,  # limit stored payload
+    "total_hours": round(library.total_minutes / 60, 2),
+    "games_count": library.games_count,
+    "recent_hours": round(library.recent_minutes / 60, 2),
+    "longest_session": int(round(top_game.playtime_forever / 60)) if top_game else 0,
+    "top_game": top_game.name if top_game else None,
+    "last_played_game": recent.name if recent and recent.playtime_2weeks else None,
   }
 
 
@@ -278,8 +347,11 @@ def _summarize_profile(summary: Dict[str, Any], level: Optional[int]) -> Dict[st
   }
 
 
-def _upsert_stats(session: Session, user: User, summary: Dict[str, Any]) -> SteamStats:
-  stats = session.exec(select(SteamStats).where(SteamStats.user_id == user.id)).first()
+def _upsert_stats(session: Session, user: User, summary: Dict[str, Any], library: SteamLibrary) -> SteamStats:
+  synced_at = datetime.utcnow()
+  steam_games.save_library(session, user.id, library.entries, synced_at)
+  steam_achievements.save(session, user.id, summary.get("achievements") or [])
+  stats = _load_stats(session, user)
   if not stats:
     stats = SteamStats(user_id=user.id)
     session.add(stats)
@@ -294,30 +366,77 @@ def _upsert_stats(session: Session, user: User, summary: Dict[str, Any]) -> Stea
   stats.avatar_url = summary.get("avatar_url")
   stats.profile_level = summary.get("profile_level")
   stats.profile_created_at = summary.get("profile_created_at")
-  stats.raw_games = summary["raw_games"]
-  stats.achievements = summary.get("achievements")
-  stats.rare_achievements = summary.get("rare_achievements")
+  stats.raw_games = None
+  stats.achievements = None
+  stats.rare_achievements = None
   stats.completed_games = summary.get("completed_games")
-  stats.last_synced_at = datetime.utcnow()
+  stats.game_snapshots = summary.get("game_snapshots")
+  stats.incomplete_stages = summary.get("incomplete_stages") or None
+  stats.last_synced_at = synced_at
   session.commit()
   session.refresh(stats)
   return stats
 
 
-async def sync_user(session: Session, user: User) -> SteamStats:
+async def sync_user(session: Session, user: User, full: bool = False) -> SteamStats:
+  return await sync_flight(_sync_flight, user.id, full, lambda: _sync_user(session, user, full))
+
+
+async def _optional(awaitable: Awaitable[T], default: T) -> T:
+  """Profile and level fall back to the previous values when the transport fails, e.g. an open breaker."""
+  try:
+    return await awaitable
+  except httpx.HTTPError:
+    return default
+
+
+async def _sync_user(session: Session, user: User, full: bool) -> SteamStats:
   if not user.steam_id:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User missing Steam ID")
-  data, profile, level = await asyncio.gather(
-    _fetch_owned_games(user.steam_id),
-    _fetch_player_summary(user.steam_id),
-    _fetch_player_level(user.steam_id),
-  )
-  games = data.get("games", [])
-  try:
-    await _attach_genres_to_games(games)
-  except Exception:
-    pass
-  summary = _summarize_games(games)
+  previous = await run_in_threadpool(_load_stats, session, user)
+  snapshots = previous.game_snapshots if previous and settings.steam_incremental_sync and not full else None
+  with deadline.budget(settings.steam_sync_budget_seconds) as budget:
+    profile_task = asyncio.ensure_future(_fetch_player_summary(user.steam_id))
+    level_task = asyncio.ensure_future(_fetch_player_level(user.steam_id))
+    try:
+      library = await deadline.within("owned_games", _fetch_owned_games(user.steam_id), None)
+      if library is None:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Steam sync timed out")
+      games = library.top_games()
+      _, achievements = await asyncio.gather(
+        deadline.within("genres", _refresh_genres(games), None),
+        _summarize_achievements(user.steam_id, games, snapshots),
+        return_exceptions=True,
+      )
+      if isinstance(achievements, BaseException):
+        raise achievements
+      profile = await _optional(deadline.within("profile", profile_task, None), None)
+      level_default = previous.profile_level if previous else None
+      level = await _optional(deadline.within("level", level_task, level_default), level_default)
+    finally:
+      profile_task.cancel()
+      level_task.cancel()
+
+  summary = _summarize_games(library, games)
+  if profile is None:
+    profile = _previous_profile(previous) if previous else {}
   summary.update(_summarize_profile(profile, level))
-  summary.update(await _summarize_achievements(user.steam_id, games))
-  return _upsert_stats(session, user, summary)
+  summary.update(achievements)
+  summary["incomplete_stages"] = budget.incomplete
+  return await run_in_threadpool(_upsert_stats, session, user, summary, library)
+
+
+def _load_stats(session: Session, user: User) -> Optional[SteamStats]:
+  return session.exec(select(SteamStats).where(SteamStats.user_id == user.id)).first()
+
+
+def _previous_profile(previous: SteamStats) -> Dict[str, Any]:
+  return {
+    "personaname": previous.persona_name,
+    "avatarfull": previous.avatar_url,
+    "timecreated": previous.profile_created_at,
+  }
+
+
+def metrics() -> Dict[str, Any]:
+  return dict(_sync_stats)
@@ -0,0 +1,85 @@
+import calendar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlmodel import Session, select
+
+from ..database import upsert
+from ..models import SteamApp, SteamUserAchievement
+
+
+def _unlocked_at(value: Any) -> Optional[datetime]:
+  try:
+    timestamp = int(value or 0)
+  except (TypeError, ValueError):
+    return None
+  return datetime.utcfromtimestamp(timestamp) if timestamp > 0 else None
+
+
+def save(session: Session, user_id: int, achievements: List[Dict[str, Any]]) -> None:
+  """Upserts unlocked achievements; unlocks are permanent, so rows for games outside this sync are kept."""
+  rows: Dict[tuple, Dict[str, Any]] = {}
+  for entry in achievements:
+    if entry.get("appid") is None or not entry.get("name"):
+      continue
+    row = {
+      "user_id": user_id,
+      "appid": int(entry["appid"]),
+      "api_name": entry["name"],
+      "unlocked_at": _unlocked_at(entry.get("unlocked_at")),
+      "global_percent": entry.get("percent"),
+    }
+    rows[(row["appid"], row["api_name"])] = row
+  upsert(
+    session,
+    SteamUserAchievement,
+    list(rows.values()),
+    keys=["user_id", "appid", "api_name"],
+    columns=["unlocked_at", "global_percent"],
+    only_changed=True,
+  )
+
+
+def _select(user_id: int):
+  return (
+    select(SteamUserAchievement, SteamApp.name)
+    .join(SteamApp, SteamApp.appid == SteamUserAchievement.appid, isouter=True)
+    .where(SteamUserAchievement.user_id == user_id)
+  )
+
+
+def _payload(rows: List[Any]) -> List[Dict[str, Any]]:
+  return [
+    {
+      "game": name or "Unknown",
+      "name": achievement.api_name,
+      "percent": achievement.global_percent,
+      "unlocked_at": calendar.timegm(achievement.unlocked_at.utctimetuple()) if achievement.unlocked_at else None,
+    }
+    for achievement, name in rows
+  ]
+
+
+def by_rarity(session: Session, user_id: int, limit: Optional[int] = None, max_percent: Optional[float] = None) -> List[Dict[str, Any]]:
+  """Rarest first (unknown percentages last); with max_percent only achievements at or below it."""
+  statement = _select(user_id)
+  if max_percent is not None:
+    statement = statement.where(SteamUserAchievement.global_percent <= max_percent)
+  statement = statement.order_by(
+    SteamUserAchievement.global_percent.asc().nulls_last(),
+    SteamUserAchievement.appid,
+    SteamUserAchievement.api_name,
+  )
+  if limit is not None:
+    statement = statement.limit(limit)
+  return _payload(session.exec(statement).all())
+
+
+def unlocked_since(session: Session, user_id: int, since: datetime, limit: int) -> List[Dict[str, Any]]:
+  statement = (
+    _select(user_id)
+    .where(SteamUserAchievement.unlocked_at >= since)
+    .order_by(SteamUserAchievement.unlocked_at.desc())
+    .limit(limit)
+  )
+  return _payload(session.exec(statement).all())
@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import select
+
+from ..config import get_settings
+from ..database import get_session, upsert
+from ..models import SteamApp
+
+settings = get_settings()
+STORE_FETCH_CONCURRENCY = 4
+
+Fetcher = Callable[[int], Awaitable[Optional[Dict[str, Any]]]]
+
+_refreshing: Set[int] = set()
+_background: Set["asyncio.Task[Any]"] = set()
+_stats = {"hits": 0, "stale_hits": 0, "misses": 0, "negative_hits": 0, "fetches": 0, "fetch_failures": 0}
+
+
+def _is_fresh(entry: Dict[str, Any], now: datetime) -> bool:
+  hours = settings.steam_catalog_ttl_hours if entry["has_store_page"] else settings.steam_catalog_negative_ttl_hours
+  return now - entry["last_checked"] < timedelta(hours=hours)
+
+
+def _load(appids: List[int]) -> Dict[int, Dict[str, Any]]:
+  if not appids:
+    return {}
+  with get_session() as session:
+    records = session.exec(select(SteamApp).where(SteamApp.appid.in_(appids))).all()
+    return {
+      record.appid: {
+        "genres": record.genres or [],
+        "has_store_page": record.has_store_page,
+        "last_checked": record.last_checked,
+      }
+      for record in records
+      if record.genres is not None
+    }
+
+
+def _save(entries: Dict[int, Dict[str, Any]], names: Dict[int, Optional[str]]) -> None:
+  if not entries:
+    return
+  rows = [
+    {
+      "appid": appid,
+      "name": names.get(appid),
+      "genres": entry["genres"],
+      "has_store_page": entry["has_store_page"],
+      "last_checked": entry["last_checked"],
+    }
+    for appid, entry in entries.items()
+  ]
+  columns = ["genres", "has_store_page", "last_checked"]
+  # Upserts like steam_games.save_library, which may insert the same appids concurrently; a missing name keeps the stored one.
+  with get_session() as session:
+    upsert(session, SteamApp, [row for row in rows if row["name"]], keys=["appid"], columns=["name", *columns])
+    upsert(session, SteamApp, [row for row in rows if not row["name"]], keys=["appid"], columns=columns)
+    session.commit()
+
+
+async def _refresh(apps: Dict[int, Optional[str]], fetch: Fetcher) -> Dict[int, Dict[str, Any]]:
+  semaphore = asyncio.Semaphore(STORE_FETCH_CONCURRENCY)
+
+  async def _fetch_one(appid: int) -> Optional[Dict[str, Any]]:
+    async with semaphore:
+      _stats["fetches"] += 1
+      details = await fetch(appid)
+    if details is None:
+      _stats["fetch_failures"] += 1
+      return None
+    return {
+      "genres": details.get("genres") or [],
+      "has_store_page": bool(details.get("listed")),
+      "last_checked": datetime.utcnow(),
+    }
+
+  appids = list(apps)
+  results = await asyncio.gather(*[_fetch_one(appid) for appid in appids])
+  entries = {appid: entry for appid, entry in zip(appids, results) if entry is not None}
+  await run_in_threadpool(_save, entries, apps)
+  return entries
+
+
+async def _refresh_in_background(apps: Dict[int, Optional[str]], fetch: Fetcher) -> None:
+  try:
+    await _refresh(apps, fetch)
+  except Exception:
+    _stats["fetch_failures"] += 1
+  finally:
+    _refreshing.difference_update(apps)
+
+
+def _schedule_refresh(apps: Dict[int, Optional[str]], fetch: Fetcher) -> None:
+  pending = {appid: name for appid, name in apps.items() if appid not in _refreshing}
+  if not pending:
+    return
+  _refreshing.update(pending)
+  task = asyncio.ensure_future(_refresh_in_background(pending, fetch))
+  _background.add(task)
+  task.add_done_callback(_background.discard)
+
+
+async def genres_for(apps: Dict[int, Optional[str]], fetch: Fetcher) -> Dict[int, List[str]]:
+  entries = await run_in_threadpool(_load, list(apps))
+  now = datetime.utcnow()
+  missing: Dict[int, Optional[str]] = {}
+  stale: Dict[int, Optional[str]] = {}
+  for appid, name in apps.items():
+    entry = entries.get(appid)
+    if entry is None:
+      missing[appid] = name
+    elif not _is_fresh(entry, now):
+      stale[appid] = name
+    elif not entry["has_store_page"]:
+      _stats["negative_hits"] += 1
+    else:
+      _stats["hits"] += 1
+  _stats["misses"] += len(missing)
+  _stats["stale_hits"] += len(stale)
+  if stale:
+    _schedule_refresh(stale, fetch)
+  if missing:
+    entries.update(await _refresh(missing, fetch))
+  return {appid: entry["genres"] for appid, entry in entries.items() if entry["genres"]}
+
+
+def metrics() -> Dict[str, Any]:
+  return dict(_stats)
@@ -0,0 +1,91 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from ..database import upsert
+from ..models import SteamApp, SteamUserGame
+
+LibraryEntry = Tuple[int, Optional[str], int, int]
+
+
+def save_library(session: Session, user_id: int, entries: List[LibraryEntry], synced_at: datetime) -> None:
+  """Upserts every owned game for the user, drops games no longer owned and records app names in the catalog."""
+  upsert(
+    session,
+    SteamUserGame,
+    [
+      {
+        "user_id": user_id,
+        "appid": appid,
+        "playtime_forever": playtime_forever,
+        "playtime_2weeks": playtime_2weeks,
+        "last_synced": synced_at,
+      }
+      for appid, _, playtime_forever, playtime_2weeks in entries
+    ],
+    keys=["user_id", "appid"],
+    columns=["playtime_forever", "playtime_2weeks", "last_synced"],
+  )
+  session.execute(
+    delete(SteamUserGame).where(SteamUserGame.user_id == user_id, SteamUserGame.last_synced < synced_at)
+  )
+  # Name-only catalog rows keep genres NULL, so the catalog still treats them as never looked up.
+  upsert(
+    session,
+    SteamApp,
+    [
+      {"appid": appid, "name": name, "has_store_page": True, "last_checked": synced_at}
+      for appid, name, _, _ in entries
+      if name
+    ],
+    keys=["appid"],
+    columns=["name"],
+    only_changed=True,
+  )
+
+
+def top_games(session: Session, user_id: int, limit: int) -> List[Dict[str, Any]]:
+  rows = session.exec(
+    select(SteamUserGame.appid, SteamUserGame.playtime_forever, SteamApp.name)
+    .join(SteamApp, SteamApp.appid == SteamUserGame.appid, isouter=True)
+    .where(SteamUserGame.user_id == user_id)
+    .order_by(SteamUserGame.playtime_forever.desc(), SteamUserGame.appid)
+    .limit(limit)
+  ).all()
+  return [
+    {"name": name or "Unknown", "appid": appid, "hours": round((playtime or 0) / 60, 1)}
+    for appid, playtime, name in rows
+  ]
+
+
+def _rank_genres(games: Iterable[Tuple[int, Optional[list]]], total_hours: float, limit: int) -> List[Dict[str, Any]]:
+  if total_hours <= 0:
+    return []
+  totals: Dict[str, float] = {}
+  for playtime, genres in games:
+    if not genres:
+      continue
+    hours = (playtime or 0) / 60
+    if hours <= 0:
+      continue
+    share = hours / len(genres)
+    for genre in genres:
+      if not genre:
+        continue
+      totals[genre] = totals.get(genre, 0.0) + share
+  ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+  return [{"name": name, "percent": round((hours / total_hours) * 100, 1)} for name, hours in ranked[:limit]]
+
+
+def top_genres(session: Session, user_id: int, total_hours: float, game_limit: int, limit: int = 3) -> List[Dict[str, Any]]:
+  """Genre shares of total playtime, weighted over the user's most played games that have catalog genres."""
+  rows = session.exec(
+    select(SteamUserGame.playtime_forever, SteamApp.genres)
+    .join(SteamApp, SteamApp.appid == SteamUserGame.appid, isouter=True)
+    .where(SteamUserGame.user_id == user_id)
+    .order_by(SteamUserGame.playtime_forever.desc(), SteamUserGame.appid)
+    .limit(game_limit)
+  ).all()
+  return _rank_genres(rows, total_hours, limit)
@@ -0,0 +1,137 @@
+import codecs
+import heapq
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+_TOKEN = re.compile(r'[{}\[\],"]')
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+_SEPARATORS = re.compile(r"[\s,]*")
+_decoder = json.JSONDecoder()
+
+
+class JsonArrayStream:
+  """Yields the objects of one nested JSON array from byte chunks without buffering the whole document."""
+
+  def __init__(self, path: Tuple[str, ...]) -> None:
+    self._path = path
+    self._utf8 = codecs.getincrementaldecoder("utf-8")()
+    self._buf = ""
+    self._pos = 0
+    self._stack: List[Tuple[str, Optional[str]]] = []
+    self._key: Optional[str] = None
+    self._expect_key = False
+    self._in_items = False
+
+  def _at_path(self) -> bool:
+    return tuple(key for _, key in self._stack[1:]) == self._path and self._stack[-1][0] == "["
+
+  def _read_items(self, items: List[Dict[str, Any]]) -> bool:
+    # Each element is handed to the C decoder whole; an incomplete one just waits for the next chunk.
+    while True:
+      self._pos = _SEPARATORS.match(self._buf, self._pos).end()
+      if self._pos >= len(self._buf):
+        return False
+      if self._buf[self._pos] == "]":
+        self._in_items = False
+        return True
+      try:
+        item, end = _decoder.raw_decode(self._buf, self._pos)
+      except json.JSONDecodeError:
+        return False
+      self._pos = end
+      if isinstance(item, dict):
+        items.append(item)
+
+  def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+    self._buf += self._utf8.decode(chunk)
+    items: List[Dict[str, Any]] = []
+    while True:
+      if self._in_items and not self._read_items(items):
+        break
+      match = _TOKEN.search(self._buf, self._pos)
+      if match is None:
+        self._pos = len(self._buf)
+        break
+      char, index = match.group(), match.start()
+      if char == '"':
+        string = _STRING.match(self._buf, index)
+        if string is None:
+          self._pos = index
+          break
+        if self._expect_key:
+          self._key = json.loads(string.group())
+          self._expect_key = False
+        self._pos = string.end()
+        continue
+      self._pos = index + 1
+      if char in "{[":
+        parent_is_object = bool(self._stack) and self._stack[-1][0] == "{"
+        self._stack.append((char, self._key if parent_is_object else None))
+        self._key = None
+        self._expect_key = char == "{"
+        self._in_items = self._at_path()
+      elif char in "}]":
+        if self._stack:
+          self._stack.pop()
+        self._expect_key = False
+      else:
+        self._expect_key = bool(self._stack) and self._stack[-1][0] == "{"
+    self._buf = self._buf[self._pos:]
+    self._pos = 0
+    return items
+
+
+class OwnedGame:
+  """The handful of GetOwnedGames fields the sync actually reads."""
+
+  __slots__ = ("appid", "name", "playtime_forever", "playtime_2weeks")
+
+  def __init__(self, appid: int, name: Optional[str], playtime_forever: int, playtime_2weeks: int) -> None:
+    self.appid = appid
+    self.name = name
+    self.playtime_forever = playtime_forever
+    self.playtime_2weeks = playtime_2weeks
+
+  @classmethod
+  def from_json(cls, item: Dict[str, Any]) -> Optional["OwnedGame"]:
+    try:
+      appid = int(item.get("appid"))
+    except (TypeError, ValueError):
+      return None
+    return cls(
+      appid,
+      item.get("name"),
+      int(item.get("playtime_forever") or 0),
+      int(item.get("playtime_2weeks") or 0),
+    )
+
+
+class SteamLibrary:
+  """Running totals, the top-N games by playtime and a compact row per owned game, built in one pass."""
+
+  def __init__(self, top_n: int) -> None:
+    self.top_n = top_n
+    self.games_count = 0
+    self.total_minutes = 0
+    self.recent_minutes = 0
+    self.most_recent: Optional[OwnedGame] = None
+    self.entries: List[Tuple[int, Optional[str], int, int]] = []
+    self._heap: List[Tuple[int, int, OwnedGame]] = []
+
+  def add(self, game: OwnedGame) -> None:
+    self.games_count += 1
+    self.total_minutes += game.playtime_forever
+    self.recent_minutes += game.playtime_2weeks
+    self.entries.append((game.appid, game.name, game.playtime_forever, game.playtime_2weeks))
+    if self.most_recent is None or game.playtime_2weeks > self.most_recent.playtime_2weeks:
+      self.most_recent = game
+    # Ties keep the earlier game, matching a stable sort over the response order.
+    entry = (game.playtime_forever, -self.games_count, game)
+    if len(self._heap) < self.top_n:
+      heapq.heappush(self._heap, entry)
+    elif entry[:2] > self._heap[0][:2]:
+      heapq.heapreplace(self._heap, entry)
+
+  def top_games(self) -> List[OwnedGame]:
+    return [game for _, _, game in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
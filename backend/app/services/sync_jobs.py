@@ -0,0 +1,287 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, update
+from sqlmodel import Session, select
+
+from ..config import get_settings
+from ..database import get_session
+from ..models import SyncJob, User
+from . import recap as recap_service
+from . import riot as riot_service
+from . import steam as steam_service
+
+settings = get_settings()
+ACTIVE_STATUSES = ("queued", "running")
+# Upstream hiccups worth another attempt; any other HTTPException (bad user, missing API key) fails right away.
+TRANSIENT_STATUSES = {429, 502, 503, 504}
+
+SyncFunc = Callable[..., Awaitable[Any]]
+PROVIDERS: Dict[str, SyncFunc] = {
+  "steam": steam_service.sync_user,
+  "riot": riot_service.sync_user,
+}
+
+
+def _provider_caps() -> Dict[str, int]:
+  return {
+    "steam": settings.sync_steam_concurrency,
+    "riot": settings.sync_riot_concurrency,
+  }
+
+
+def job_payload(job: SyncJob) -> Dict[str, Any]:
+  return {
+    "job_id": job.id,
+    "provider": job.provider,
+    "user_id": job.user_id,
+    "status": job.status,
+    "stage": job.stage,
+    "attempts": job.attempts,
+    "error": job.error,
+    "created_at": job.created_at,
+    "started_at": job.started_at,
+    "finished_at": job.finished_at,
+  }
+
+
+def enqueue(session: Session, user_id: int, provider: str, full: bool = False) -> SyncJob:
+  active = session.exec(
+    select(SyncJob)
+    .where(
+      SyncJob.user_id == user_id,
+      SyncJob.provider == provider,
+      SyncJob.status.in_(ACTIVE_STATUSES),
+    )
+    .order_by(SyncJob.id)
+  ).all()
+  for existing in active:
+    if existing.full or not full:
+      return existing
+  # A full request upgrades a queued incremental job; one already running gets a full follow-up job.
+  queued = next((existing for existing in active if existing.status == "queued"), None)
+  if queued is not None:
+    upgraded = session.exec(
+      update(SyncJob).where(SyncJob.id == queued.id, SyncJob.status == "queued").values(full=True)
+    )
+    session.commit()
+    if upgraded.rowcount == 1:
+      session.refresh(queued)
+      return queued
+  job = SyncJob(user_id=user_id, provider=provider, full=full)
+  session.add(job)
+  session.commit()
+  session.refresh(job)
+  workers.notify()
+  return job
+
+
+class SyncWorkerPool:
+  """Asyncio workers draining the persisted sync job queue with per-provider caps."""
+
+  def __init__(self) -> None:
+    self._tasks: List["asyncio.Task[None]"] = []
+    self._requeue_task: Optional["asyncio.Task[None]"] = None
+    self._wakeup: Optional[asyncio.Event] = None
+    self._loop: Optional[asyncio.AbstractEventLoop] = None
+    self._claim_lock: Optional[asyncio.Lock] = None
+    self._running: Dict[str, int] = {provider: 0 for provider in PROVIDERS}
+    self._stats = {"completed": 0, "failed": 0, "retried": 0, "requeued": 0, "requeue_errors": 0}
+
+  def notify(self) -> None:
+    # enqueue() may run on a threadpool worker (sync routes), so hop back onto the loop.
+    if self._wakeup is None or self._loop is None:
+      return
+    try:
+      on_loop = asyncio.get_running_loop() is self._loop
+    except RuntimeError:
+      on_loop = False
+    if on_loop:
+      self._wakeup.set()
+    elif not self._loop.is_closed():
+      self._loop.call_soon_threadsafe(self._wakeup.set)
+
+  async def start(self) -> None:
+    self._loop = asyncio.get_running_loop()
+    self._wakeup = asyncio.Event()
+    self._claim_lock = asyncio.Lock()
+    await self._requeue()
+    for _ in range(settings.sync_workers):
+      self._tasks.append(asyncio.create_task(self._work()))
+    if settings.sync_job_requeue_interval_seconds > 0:
+      self._requeue_task = asyncio.create_task(self._requeue_loop())
+
+  async def stop(self) -> None:
+    tasks = self._tasks + ([self._requeue_task] if self._requeue_task else [])
+    for task in tasks:
+      task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    self._tasks.clear()
+    self._requeue_task = None
+
+  async def _requeue(self) -> None:
+    requeued = await run_in_threadpool(_requeue_stale_jobs)
+    self._stats["requeued"] += requeued
+    if requeued:
+      self.notify()
+
+  async def _requeue_loop(self) -> None:
+    # Jobs whose lease outlived sync_job_stale_seconds belong to a worker that died mid-run, possibly in another process.
+    while True:
+      await asyncio.sleep(settings.sync_job_requeue_interval_seconds)
+      try:
+        await self._requeue()
+      except Exception:
+        self._stats["requeue_errors"] += 1
+
+  async def _claim(self) -> Optional[SyncJob]:
+    async with self._claim_lock:
+      caps = _provider_caps()
+      available = [provider for provider, running in self._running.items() if running < caps[provider]]
+      if not available:
+        return None
+      job = await run_in_threadpool(_claim_job, available)
+      if job is not None:
+        self._running[job.provider] += 1
+      return job
+
+  async def _work(self) -> None:
+    while True:
+      job = await self._claim()
+      if job is None:
+        try:
+          await asyncio.wait_for(self._wakeup.wait(), timeout=settings.sync_job_poll_seconds)
+        except asyncio.TimeoutError:
+          pass
+        self._wakeup.clear()
+        continue
+      try:
+        await self._run(job)
+      finally:
+        self._running[job.provider] -= 1
+        self.notify()
+
+  async def _run(self, job: SyncJob) -> None:
+    try:
+      with get_session() as session:
+        user = await run_in_threadpool(session.get, User, job.user_id)
+        if not user:
+          raise HTTPException(status_code=404, detail="User not found")
+        await run_in_threadpool(_update_job, job, stage="sync")
+        if job.provider == "steam":
+          await _prime_steam_profiles(user)
+        await PROVIDERS[job.provider](session, user, full=job.full)
+        await run_in_threadpool(_update_job, job, stage="recap")
+        await run_in_threadpool(recap_service.materialize, session, user.id)
+    except HTTPException as exc:
+      if exc.status_code in TRANSIENT_STATUSES:
+        await self._retry_or_fail(job, str(exc.detail))
+      else:
+        await self._finish(job, "failed", str(exc.detail))
+    except Exception as exc:
+      await self._retry_or_fail(job, repr(exc))
+    else:
+      await self._finish(job, "completed")
+
+  async def _retry_or_fail(self, job: SyncJob, error: str) -> None:
+    if job.attempts >= settings.sync_job_max_attempts:
+      await self._finish(job, "failed", error)
+      return
+    self._stats["retried"] += 1
+    delay = settings.sync_job_retry_seconds * (2 ** (job.attempts - 1))
+    await run_in_threadpool(
+      _update_job,
+      job,
+      status="queued",
+      stage=None,
+      error=error,
+      run_after=datetime.utcnow() + timedelta(seconds=delay),
+    )
+
+  async def _finish(self, job: SyncJob, status: str, error: Optional[str] = None) -> None:
+    self._stats[status] += 1
+    stage = None if status == "completed" else job.stage
+    await run_in_threadpool(_update_job, job, status=status, stage=stage, error=error, finished_at=datetime.utcnow())
+
+  def metrics(self) -> Dict[str, Any]:
+    payload: Dict[str, Any] = dict(self._stats)
+    payload["workers"] = len(self._tasks)
+    payload["running"] = dict(self._running)
+    return payload
+
+
+def _update_job(job: SyncJob, **values: Any) -> None:
+  # Scoped to this run's lease: once requeued and claimed again the job belongs to another worker.
+  for field, value in values.items():
+    setattr(job, field, value)
+  with get_session() as session:
+    session.exec(
+      update(SyncJob)
+      .where(SyncJob.id == job.id, SyncJob.started_at == job.started_at, SyncJob.status == "running")
+      .values(**values)
+    )
+    session.commit()
+
+
+async def _prime_steam_profiles(user: User) -> None:
+  # The first claim fetches the profiles of the steam jobs due next in one call; their claims then hit the primed entries.
+  if not user.steam_id or steam_service.profile_primed(user.steam_id):
+    return
+  steam_ids = await run_in_threadpool(_queued_steam_ids, steam_service.PLAYER_SUMMARY_BATCH_SIZE - 1)
+  await steam_service.prefetch_profiles([user.steam_id, *steam_ids])
+
+
+def _queued_steam_ids(limit: int) -> List[str]:
+  now = datetime.utcnow()
+  with get_session() as session:
+    steam_ids = session.exec(
+      select(User.steam_id)
+      .join(SyncJob, SyncJob.user_id == User.id)
+      .where(SyncJob.provider == "steam", SyncJob.status == "queued", SyncJob.run_after <= now)
+      .order_by(SyncJob.run_after, SyncJob.id)
+      .limit(limit)
+    ).all()
+  return [steam_id for steam_id in steam_ids if steam_id]
+
+
+def _claim_job(available: List[str]) -> Optional[SyncJob]:
+  now = datetime.utcnow()
+  with get_session() as session:
+    candidates = session.exec(
+      select(SyncJob)
+      .where(SyncJob.status == "queued", SyncJob.run_after <= now, SyncJob.provider.in_(available))
+      .order_by(SyncJob.run_after, SyncJob.id)
+      .limit(len(available) * 4)
+    ).all()
+    for job in candidates:
+      claimed = session.exec(
+        update(SyncJob)
+        .where(SyncJob.id == job.id, SyncJob.status == "queued")
+        .values(status="running", attempts=SyncJob.attempts + 1, started_at=now)
+      )
+      session.commit()
+      if claimed.rowcount == 1:
+        session.refresh(job)
+        return job
+  return None
+
+
+def _requeue_stale_jobs() -> int:
+  now = datetime.utcnow()
+  stale = and_(SyncJob.status == "running", SyncJob.started_at < now - timedelta(seconds=settings.sync_job_stale_seconds))
+  with get_session() as session:
+    # A job that keeps taking its worker down stops being retried once it used up its attempts.
+    session.exec(
+      update(SyncJob)
+      .where(stale, SyncJob.attempts >= settings.sync_job_max_attempts)
+      .values(status="failed", error="worker lease expired", finished_at=now)
+    )
+    requeued = session.exec(update(SyncJob).where(stale).values(status="queued", stage=None, run_after=now))
+    session.commit()
+    return requeued.rowcount
+
+
+workers = SyncWorkerPool()
@@ -0,0 +1,214 @@
+import asyncio
+import importlib.util
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..config import get_settings
+from .resilience import (
+  IDEMPOTENT_METHODS,
+  RETRYABLE_STATUSES,
+  CircuitBreaker,
+  backoff_delay,
+  retry_after_delay,
+)
+from .singleflight import SingleFlight, freeze
+
+settings = get_settings()
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+
+
+@dataclass
+class PoolStats:
+  requests: int = 0
+  errors: int = 0
+  retries: int = 0
+  hedged: int = 0
+  hedge_wins: int = 0
+  in_flight: int = 0
+  peak_in_flight: int = 0
+
+
+def _origin(url: str) -> str:
+  parts = urlsplit(url)
+  return f"{parts.scheme}://{parts.netloc}"
+
+
+def _http2_enabled() -> bool:
+  return settings.http_http2 and importlib.util.find_spec("h2") is not None
+
+
+class OverrideTransport(httpx.AsyncHTTPTransport):
+  """Sends every request to one base URL, keeping the original Host header (see app.fake_upstream)."""
+
+  def __init__(self, base_url: str, **kwargs: Any) -> None:
+    super().__init__(**kwargs)
+    self._base = httpx.URL(base_url)
+
+  async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+    request.url = request.url.copy_with(scheme=self._base.scheme, host=self._base.host, port=self._base.port)
+    return await super().handle_async_request(request)
+
+
+class ClientRegistry:
+  """Application-scoped httpx clients, one keep-alive pool per upstream host."""
+
+  def __init__(self) -> None:
+    self._clients: Dict[str, httpx.AsyncClient] = {}
+    self._stats: Dict[str, PoolStats] = {}
+    self._breakers: Dict[str, CircuitBreaker] = {}
+    self._latencies: Dict[str, Deque[float]] = {}
+    self._get_flight = SingleFlight("upstream_get")
+
+  def _build_client(self) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+      max_connections=settings.http_max_connections,
+      max_keepalive_connections=settings.http_max_keepalive_connections,
+      keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout)
+    if settings.upstream_override_url:
+      transport = OverrideTransport(settings.upstream_override_url, limits=limits, http2=_http2_enabled())
+      return httpx.AsyncClient(timeout=timeout, transport=transport)
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=_http2_enabled())
+
+  def client_for(self, url: str) -> httpx.AsyncClient:
+    origin = _origin(url)
+    client = self._clients.get(origin)
+    if client is None or client.is_closed:
+      client = self._build_client()
+      self._clients[origin] = client
+      self._stats.setdefault(origin, PoolStats())
+      self._breakers.setdefault(origin, CircuitBreaker(origin))
+      self._latencies.setdefault(origin, deque(maxlen=LATENCY_WINDOW))
+    return client
+
+  async def _send(self, method: str, url: str, stream: bool = False, **kwargs: Any) -> httpx.Response:
+    client = self.client_for(url)
+    origin = _origin(url)
+    stats = self._stats[origin]
+    stats.requests += 1
+    stats.in_flight += 1
+    stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+    started = time.perf_counter()
+    try:
+      auth = kwargs.pop("auth", httpx.USE_CLIENT_DEFAULT)
+      response = await client.send(client.build_request(method, url, **kwargs), auth=auth, stream=stream)
+      self._latencies[origin].append(time.perf_counter() - started)
+      return response
+    except httpx.HTTPError:
+      stats.errors += 1
+      raise
+    finally:
+      stats.in_flight -= 1
+
+  async def request(self, method: str, url: str, retry_on_429: bool = True, **kwargs: Any) -> httpx.Response:
+    self.client_for(url)
+    origin = _origin(url)
+    breaker = self._breakers[origin]
+    attempts = settings.upstream_max_retries + 1 if method in IDEMPOTENT_METHODS else 1
+    attempt = 0
+    while True:
+      attempt += 1
+      breaker.before_request()
+      try:
+        response = await self._send(method, url, **kwargs)
+      except httpx.TransportError:
+        breaker.record_failure()
+        if attempt >= attempts:
+          raise
+        self._stats[origin].retries += 1
+        await asyncio.sleep(backoff_delay(attempt - 1))
+        continue
+      except BaseException:
+        breaker.abandon()
+        raise
+      if response.status_code in RETRYABLE_STATUSES:
+        breaker.record_failure()
+      else:
+        breaker.record_success()
+      retryable = response.status_code in RETRYABLE_STATUSES or (retry_on_429 and response.status_code == 429)
+      if not retryable or attempt >= attempts:
+        return response
+      await response.aclose()
+      self._stats[origin].retries += 1
+      delay = retry_after_delay(response)
+      await asyncio.sleep(delay if delay is not None else backoff_delay(attempt - 1))
+
+  @asynccontextmanager
+  async def stream(self, method: str, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+    """request() with the body left unread for the caller to iterate; retries stop once headers arrive."""
+    response = await self.request(method, url, stream=True, **kwargs)
+    try:
+      yield response
+    finally:
+      await response.aclose()
+
+  def hedge_delay(self, url: str) -> Optional[float]:
+    samples = sorted(self._latencies.get(_origin(url)) or ())
+    if len(samples) < HEDGE_MIN_SAMPLES:
+      return None
+    return samples[int(len(samples) * 0.95) - 1]
+
+  async def _hedged(self, url: str, delay: float, **kwargs: Any) -> httpx.Response:
+    stats = self._stats[_origin(url)]
+    primary = asyncio.ensure_future(self.request("GET", url, **kwargs))
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+      return primary.result()
+    stats.hedged += 1
+    backup = asyncio.ensure_future(self.request("GET", url, **kwargs))
+    pending = {primary, backup}
+    try:
+      while True:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        winner = next((task for task in done if task.exception() is None), None)
+        if winner is not None:
+          if winner is backup:
+            stats.hedge_wins += 1
+          return winner.result()
+        if not pending:
+          return done.pop().result()
+    finally:
+      for task in (primary, backup):
+        if not task.done():
+          task.cancel()
+
+  async def get(self, url: str, hedge: bool = False, **kwargs: Any) -> httpx.Response:
+    """GET with coalescing; hedge=True sends a backup request once the host's p95 latency has elapsed."""
+    key = (url, freeze(kwargs.get("params")), freeze(kwargs.get("headers")))
+    delay = self.hedge_delay(url) if hedge and settings.upstream_hedging else None
+    if delay is None:
+      return await self._get_flight.do(key, lambda: self.request("GET", url, **kwargs))
+    return await self._get_flight.do(key, lambda: self._hedged(url, delay, **kwargs))
+
+  async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+    return await self.request("POST", url, **kwargs)
+
+  def metrics(self) -> Dict[str, Dict[str, Any]]:
+    payload: Dict[str, Dict[str, Any]] = {}
+    for origin, stats in self._stats.items():
+      entry: Dict[str, Any] = asdict(stats)
+      client = self._clients.get(origin)
+      pool = getattr(getattr(client, "_transport", None), "_pool", None)
+      entry["open_connections"] = len(getattr(pool, "connections", []) or [])
+      entry["breaker"] = self._breakers[origin].metrics()
+      p95 = self.hedge_delay(origin)
+      entry["p95_seconds"] = round(p95, 4) if p95 is not None else None
+      payload[origin] = entry
+    return payload
+
+  async def aclose(self) -> None:
+    clients = list(self._clients.values())
+    self._clients.clear()
+    for client in clients:
+      await client.aclose()
+
+
+registry = ClientRegistry()
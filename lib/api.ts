@@ -57,8 +57,22 @@ async function handleResponse<T>(response: Response): Promise<T> {
   return (await response.json()) as T;
 }
 
-export async function fetchRecap(userId: number = DEFAULT_USER_ID): Promise<UserStats | null> {
-  const response = await fetch(buildUrl(`/recap?user_id=${userId}`), { cache: "no-store" });
+export type RecapSection = "summary" | "steam_profile" | "steam_games" | "steam_achievements" | "riot" | "sync";
+
+export type RecapQuery = {
+  include?: RecapSection[];
+  fields?: string[];
+};
+
+export async function fetchRecap(userId: number = DEFAULT_USER_ID, query: RecapQuery = {}): Promise<UserStats | null> {
+  const params = new URLSearchParams({ user_id: String(userId) });
+  if (query.include?.length) {
+    params.set("include", query.include.join(","));
+  }
+  if (query.fields?.length) {
+    params.set("fields", query.fields.join(","));
+  }
+  const response = await fetch(buildUrl(`/recap?${params.toString()}`), { cache: "no-store" });
   if (!response.ok) {
     const message = await readErrorMessage(response);
     const normalized = message.toLowerCase();
@@ -108,11 +122,35 @@ export async function fetchRecap(userId: number = DEFAULT_USER_ID): Promise<User
   };
 }
 
-export async function syncProvider(provider: Provider, userId: number = DEFAULT_USER_ID) {
+export type SyncJob = {
+  job_id: number;
+  provider: Provider;
+  user_id: number;
+  status: "queued" | "running" | "completed" | "failed";
+  attempts: number;
+  error: string | null;
+};
+
+const SYNC_POLL_INTERVAL_MS = 1000;
+
+export async function fetchSyncJob(jobId: number): Promise<SyncJob> {
+  const response = await fetch(buildUrl(`/sync/jobs/${jobId}`), { cache: "no-store" });
+  return handleResponse<SyncJob>(response);
+}
+
+export async function syncProvider(provider: Provider, userId: number = DEFAULT_USER_ID): Promise<SyncJob> {
   const response = await fetch(buildUrl(`/sync/${provider}?user_id=${userId}`), {
     method: "POST",
   });
-  return handleResponse(response);
+  let job = await handleResponse<SyncJob>(response);
+  while (job.status === "queued" || job.status === "running") {
+    await new Promise((resolve) => setTimeout(resolve, SYNC_POLL_INTERVAL_MS));
+    job = await fetchSyncJob(job.job_id);
+  }
+  if (job.status === "failed") {
+    throw new ApiError(job.error ?? "Sync failed", 502);
+  }
+  return job;
 }
 
 export async function disconnectProvider(provider: Provider) {